@@ -6,7 +6,11 @@ ImageUnity - Image processing web application for LoRA training preparation.
 import argparse
 import os
 import sys
-from server import create_app
+from server import default_lock_dir
+from server.serving import DEFAULT_THREADS, DEFAULT_TIMEOUT, DEFAULT_WORKERS, SERVERS, run_server
+from processor.image_processor import CROP_MODES, DEFAULT_ENCODER, ENCODER_PROFILES, ImageProcessor
+from processor.batch import ProgressBar, normalize_orientations, parse_ratio, parse_size, run_batch
+from processor.locks import FileLocks
 
 
 def parse_args():
@@ -20,6 +24,11 @@ Examples:
   python app.py --dir ./images --trash ./trash
   python app.py --dir ./images --host 0.0.0.0 --port 8080
   python app.py --dir ./images --copy  # Non-destructive mode
+  python app.py --dir ./images --index-db ./images.db  # Persist metadata
+  python app.py --dir ./images --encode-workers 8  # Parallel multi-size output
+  python app.py --dir ./images --watch  # Follow files written by other tools
+  python app.py --dir ./images --server gunicorn --workers 4 --watch
+  python app.py batch --help  # Headless batch processing
         '''
     )
     
@@ -54,7 +63,222 @@ Examples:
         help='Non-destructive mode: save as copies instead of overwriting'
     )
     
-    return parser.parse_args()
+    parser.add_argument(
+        '--index-db',
+        default=None,
+        help='Optional SQLite database for persisting image metadata across restarts'
+    )
+    
+    parser.add_argument(
+        '--thumb-cache',
+        default=None,
+        help='Directory for cached thumbnails (default: a folder in the system temp dir)'
+    )
+    
+    parser.add_argument(
+        '--thumb-cache-size',
+        type=int,
+        default=256,
+        help='Maximum thumbnail cache size in MB (default: 256)'
+    )
+    
+    parser.add_argument(
+        '--encode-workers',
+        type=int,
+        default=0,
+        help='Worker processes for resizing/encoding multiple outputs (default: 0, use threads)'
+    )
+    
+    parser.add_argument(
+        '--encoder',
+        choices=list(ENCODER_PROFILES),
+        default=DEFAULT_ENCODER,
+        help=f'Default output encoder profile, speed vs file size (default: {DEFAULT_ENCODER})'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Pick up files added or changed by other programs while running (inotify on Linux)'
+    )
+    
+    parser.add_argument(
+        '--watch-interval',
+        type=float,
+        default=2.0,
+        help='Seconds between directory scans when inotify is unavailable (default: 2)'
+    )
+    
+    parser.add_argument(
+        '--server',
+        choices=SERVERS,
+        default='dev',
+        help='HTTP server: Flask development server, waitress or gunicorn (default: dev)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Worker processes, gunicorn only (default: {DEFAULT_WORKERS})'
+    )
+    
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=DEFAULT_THREADS,
+        help=f'Request threads per process for waitress/gunicorn; each open event stream '
+             f'holds one (default: {DEFAULT_THREADS})'
+    )
+    
+    parser.add_argument(
+        '--timeout',
+        type=int,
+        default=DEFAULT_TIMEOUT,
+        help=f'Request timeout in seconds for waitress/gunicorn (default: {DEFAULT_TIMEOUT})'
+    )
+    
+    args = parser.parse_args()
+    if args.workers < 1 or args.threads < 1 or args.timeout < 1:
+        parser.error('--workers, --threads and --timeout must be at least 1')
+    return args
+
+
+def parse_batch_args(argv):
+    """Parse command line arguments for the batch subcommand."""
+    parser = argparse.ArgumentParser(
+        prog='app.py batch',
+        description='ImageUnity - Crop and scale a whole directory without the web UI',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python app.py batch --dir ./images --ratio 1:1 --sizes 512 768 1024 --copy
+  python app.py batch --dir ./images --crop-ratio 2:3 --sizes 512x768
+  python app.py batch --dir ./images --crop-ratio 1:1 --crop-mode smart
+  python app.py batch --dir ./images --normalize-orientation
+        '''
+    )
+    
+    parser.add_argument(
+        '--dir', '-d',
+        required=True,
+        help='Directory containing images to process'
+    )
+    
+    parser.add_argument(
+        '--sizes', '-s',
+        nargs='+',
+        default=[],
+        type=parse_size,
+        help='Target sizes, e.g. 512 (square) or 768x512'
+    )
+    
+    parser.add_argument(
+        '--ratio', '-r',
+        type=parse_ratio,
+        default=None,
+        help='Only process images with this aspect ratio, e.g. 1:1'
+    )
+    
+    parser.add_argument(
+        '--crop-ratio',
+        type=parse_ratio,
+        default=None,
+        help='Crop images to this aspect ratio before scaling'
+    )
+    
+    parser.add_argument(
+        '--crop-mode',
+        choices=CROP_MODES,
+        default='center',
+        help='Crop placement: centered, or over the most detailed region (default: center)'
+    )
+    
+    parser.add_argument(
+        '--normalize-orientation',
+        action='store_true',
+        help='Rotate/mirror pixels to match each image\'s EXIF orientation and clear the tag '
+             '(lossless for JPEG when jpegtran is installed)'
+    )
+    
+    parser.add_argument(
+        '--copy', '-c',
+        action='store_true',
+        help='Non-destructive mode: save as copies instead of overwriting'
+    )
+    
+    parser.add_argument(
+        '--encoder',
+        choices=list(ENCODER_PROFILES),
+        default=DEFAULT_ENCODER,
+        help=f'Output encoder profile, speed vs file size (default: {DEFAULT_ENCODER})'
+    )
+    
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=os.cpu_count() or 4,
+        help='Number of images processed concurrently (default: CPU count)'
+    )
+    
+    args = parser.parse_args(argv)
+    if args.normalize_orientation:
+        if args.sizes or args.crop_ratio:
+            parser.error('--normalize-orientation cannot be combined with --sizes or --crop-ratio')
+    elif not args.sizes and not args.crop_ratio:
+        parser.error('nothing to do: give --sizes and/or --crop-ratio, or --normalize-orientation')
+    return args
+
+
+def batch_main(argv):
+    """Entry point for the batch subcommand."""
+    args = parse_batch_args(argv)
+    if not os.path.isdir(args.dir):
+        print(f"Error: Image directory does not exist: {args.dir}", file=sys.stderr)
+        sys.exit(1)
+    
+    image_dir = os.path.abspath(args.dir)
+    # Same lock files as the server, so a running UI and the batch don't collide
+    processor = ImageProcessor(image_dir, copy_mode=args.copy, locks=FileLocks(default_lock_dir(image_dir)),
+                               encoder=args.encoder)
+    # Take the listing up front so copy-mode outputs are not processed again
+    filenames = processor.list_images()
+    print(f"Processing {len(filenames)} images with {args.workers} workers...")
+    
+    if args.normalize_orientation:
+        summary = normalize_orientations(processor, filenames, workers=args.workers,
+                                         progress=ProgressBar(len(filenames)))
+        print(f"  Lossless:  {summary['lossless']}")
+        print(f"  Re-encoded: {summary['reencoded']}")
+        print(f"  Upright:   {summary['upright']}")
+        print(f"  Skipped:   {summary['skipped']}")
+        print(f"  Failed:    {summary['failed']}")
+        print(f"  Time:      {summary['elapsed']:.1f}s")
+        if summary['failed']:
+            sys.exit(1)
+        return
+    
+    summary = run_batch(
+        processor,
+        filenames,
+        sizes=args.sizes,
+        ratio=args.ratio,
+        crop_ratio=args.crop_ratio,
+        crop_mode=args.crop_mode,
+        workers=args.workers,
+        progress=ProgressBar(len(filenames))
+    )
+    
+    print(f"  Processed: {summary['processed']}")
+    print(f"  Skipped:   {summary['skipped']}")
+    print(f"  Failed:    {summary['failed']}")
+    print(f"  Time:      {summary['elapsed']:.1f}s")
+    print(f"  Throughput: {summary['images_per_sec']:.1f} images/sec, "
+          f"{summary['mb_per_sec']:.1f} MB/sec read, "
+          f"{summary['bytes_written'] / 1e6:.1f} MB written")
+    
+    if summary['failed']:
+        sys.exit(1)
 
 
 def validate_directories(args):
@@ -73,29 +297,54 @@ def validate_directories(args):
 
 def main():
     """Main entry point."""
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        batch_main(sys.argv[2:])
+        return
+    
     args = parse_args()
     validate_directories(args)
     
     # Convert to absolute paths
     image_dir = os.path.abspath(args.dir)
     trash_dir = os.path.abspath(args.trash) if args.trash else None
+    index_db = os.path.abspath(args.index_db) if args.index_db else None
     
     print(f"ImageUnity starting...")
     print(f"  Image directory: {image_dir}")
     if trash_dir:
         print(f"  Trash directory: {trash_dir}")
     print(f"  Mode: {'Copy (non-destructive)' if args.copy else 'Destructive (overwrite)'}")
-    print(f"  Server: http://{args.host}:{args.port}")
+    print(f"  Encoder profile: {args.encoder}")
+    if index_db:
+        print(f"  Metadata database: {index_db}")
+    print(f"  Server: http://{args.host}:{args.port} ({args.server})")
+    if args.server == 'gunicorn' and args.workers > 1 and not args.watch:
+        print("  Note: without --watch, change events only reach clients of the worker that made the change")
+    if args.server == 'gunicorn' and args.workers > 1:
+        print("  Note: jobs live in the worker that accepted them; requests for a job that reach "
+              "another worker get 404")
     print()
     
     # Create and run the Flask app
-    app = create_app(
+    app_options = dict(
         image_dir=image_dir,
         trash_dir=trash_dir,
-        copy_mode=args.copy
+        copy_mode=args.copy,
+        index_db=index_db,
+        thumb_cache_dir=os.path.abspath(args.thumb_cache) if args.thumb_cache else None,
+        thumb_cache_size=args.thumb_cache_size * 1024 * 1024,
+        encode_workers=args.encode_workers,
+        watch=args.watch,
+        watch_interval=args.watch_interval,
+        encoder=args.encoder
     )
     
-    app.run(host=args.host, port=args.port, debug=False)
+    try:
+        run_server(args.server, app_options, args.host, args.port,
+                   workers=args.workers, threads=args.threads, timeout=args.timeout)
+    except (ImportError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == '__main__':
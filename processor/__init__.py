@@ -2,6 +2,8 @@
 ImageUnity Image Processor Package
 """
 
-from .image_processor import ImageProcessor
+from .directory_index import DirectoryIndex
+from .image_processor import ImageProcessor, MetadataCache
+from .metadata_store import MetadataStore
 
-__all__ = ['ImageProcessor']
+__all__ = ['DirectoryIndex', 'ImageProcessor', 'MetadataCache', 'MetadataStore']
@@ -0,0 +1,229 @@
+"""
+Headless batch processing for ImageUnity.
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Dict, List, Optional, Sequence, TextIO, Tuple
+
+from .image_processor import ImageProcessor
+
+# Aspect ratio presets (width, height), mirroring RATIOS in static/js/app.js
+RATIOS = {
+    '1:1': (1, 1),
+    '2:3': (2, 3),
+    '3:2': (3, 2),
+    '9:16': (9, 16),
+    '16:9': (16, 9),
+}
+
+# Allowed difference between an image's ratio and a preset for it to match
+RATIO_TOLERANCE = 0.02
+
+# Images queued per worker thread; the rest are submitted as these finish
+PENDING_PER_WORKER = 2
+
+
+def parse_ratio(text: str) -> Tuple[int, int]:
+    """
+    Parse an aspect ratio like '16:9'.
+
+    Raises:
+        ValueError: If the text is not a valid ratio
+    """
+    try:
+        w, h = (int(v) for v in text.split(':'))
+    except ValueError:
+        raise ValueError(f"Invalid ratio: {text!r}, expected W:H")
+    if w < 1 or h < 1:
+        raise ValueError(f"Invalid ratio: {text!r}, expected W:H")
+    return w, h
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    """
+    Parse a target size like '512' (square) or '768x512'.
+
+    Raises:
+        ValueError: If the text is not a valid size
+    """
+    try:
+        parts = [int(v) for v in text.lower().split('x')]
+    except ValueError:
+        raise ValueError(f"Invalid size: {text!r}, expected N or WxH")
+    if len(parts) == 1:
+        parts = parts * 2
+    if len(parts) != 2 or parts[0] < 1 or parts[1] < 1:
+        raise ValueError(f"Invalid size: {text!r}, expected N or WxH")
+    return parts[0], parts[1]
+
+
+def matches_ratio(width: int, height: int, ratio: Tuple[int, int]) -> bool:
+    """Check whether dimensions match an aspect ratio within RATIO_TOLERANCE."""
+    return abs(width / height - ratio[0] / ratio[1]) < RATIO_TOLERANCE
+
+
+class ProgressBar:
+    """Single-line progress bar with throughput, written to a terminal stream."""
+
+    def __init__(self, total: int, stream: TextIO = sys.stderr, width: int = 30):
+        self.total = total
+        self.stream = stream
+        self.width = width
+        self.start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def update(self, done: int, bytes_read: int) -> None:
+        """Redraw the bar for the given number of finished images."""
+        elapsed = max(time.monotonic() - self.start, 1e-6)
+        filled = self.width * done // self.total if self.total else self.width
+        bar = '#' * filled + '.' * (self.width - filled)
+        with self._lock:
+            self.stream.write(
+                f"\r[{bar}] {done}/{self.total}  "
+                f"{done / elapsed:.1f} img/s  {bytes_read / elapsed / 1e6:.1f} MB/s"
+            )
+            self.stream.flush()
+
+    def finish(self) -> None:
+        with self._lock:
+            self.stream.write('\n')
+            self.stream.flush()
+
+
+def run_batch(processor: ImageProcessor, filenames: List[str], sizes: Sequence[Tuple[int, int]] = (),
+              ratio: Optional[Tuple[int, int]] = None, crop_ratio: Optional[Tuple[int, int]] = None,
+              crop_mode: str = 'center', workers: int = 4, progress=None,
+              cancel: Optional[threading.Event] = None, encoder: Optional[str] = None) -> Dict:
+    """
+    Crop and/or scale many images with a pool of worker threads.
+
+    Each image goes through ImageProcessor.process_image, so outputs are
+    named and written exactly as in the web UI.
+
+    Args:
+        processor: ImageProcessor for the directory
+        filenames: Images to consider
+        sizes: Target (width, height) pairs
+        ratio: Only process images matching this aspect ratio
+        crop_ratio: Crop each image to this aspect ratio first
+        crop_mode: Crop placement, 'center' or 'smart' (see auto_crop_box)
+        workers: Number of images processed concurrently
+        progress: Optional ProgressBar, or any object with the same
+            update(done, bytes_read) and finish() methods
+        cancel: Optional event; once set, images not yet started are
+            dropped and counted as cancelled
+        encoder: Output encoder profile (default: the processor's)
+
+    Returns:
+        Summary dict with processed/skipped/failed/cancelled counts, bytes
+        read and written, elapsed seconds, images_per_sec and mb_per_sec
+    """
+    def process_one(filename):
+        if cancel is not None and cancel.is_set():
+            return 'cancelled', 0, 0
+        info = processor.get_image_info(filename)
+        if info is None:
+            return 'failed', 0, 0
+        if ratio is not None and not matches_ratio(info['width'], info['height'], ratio):
+            return 'skipped', 0, 0
+
+        needs_crop = crop_ratio is not None and not matches_ratio(info['width'], info['height'], crop_ratio)
+        if not needs_crop and not sizes:
+            return 'skipped', 0, 0
+
+        outputs = processor.process_image(filename, sizes=sizes,
+                                          crop_ratio=crop_ratio if needs_crop else None,
+                                          crop_mode=crop_mode, encoder=encoder)
+        if outputs is None:
+            return 'failed', 0, 0
+        written = sum(processor.get_image_path(name).stat().st_size for name in outputs)
+        return 'processed', info['size'], written
+
+    summary = {'processed': 0, 'skipped': 0, 'failed': 0, 'cancelled': 0}
+    return _run_pool(process_one, filenames, summary, ('processed',), workers, progress)
+
+
+def normalize_orientations(processor: ImageProcessor, filenames: List[str], workers: int = 4,
+                           progress=None, cancel: Optional[threading.Event] = None) -> Dict:
+    """
+    Bake EXIF orientation into every rotated or mirrored image.
+
+    Each image goes through ImageProcessor.normalize_orientation. Upright
+    images are recognised from the (cached) image info and not reopened.
+
+    Args:
+        processor: ImageProcessor for the directory
+        filenames: Images to consider
+        workers: Number of images processed concurrently
+        progress: Optional ProgressBar (see run_batch)
+        cancel: Optional event; once set, images not yet started are
+            dropped and counted as cancelled
+
+    Returns:
+        Summary dict with lossless/reencoded/upright/skipped/failed/cancelled
+        counts, bytes read and written, elapsed seconds, images_per_sec and
+        mb_per_sec
+    """
+    def process_one(filename):
+        if cancel is not None and cancel.is_set():
+            return 'cancelled', 0, 0
+        info = processor.get_image_info(filename)
+        if info is None:
+            return 'failed', 0, 0
+        if info['orientation'] == 1:
+            return 'upright', 0, 0
+
+        status = processor.normalize_orientation(filename)
+        if status is None:
+            return 'failed', 0, 0
+        if status in ('upright', 'skipped'):
+            return status, 0, 0
+        return status, info['size'], processor.get_image_path(filename).stat().st_size
+
+    summary = {'lossless': 0, 'reencoded': 0, 'upright': 0, 'skipped': 0, 'failed': 0, 'cancelled': 0}
+    return _run_pool(process_one, filenames, summary, ('lossless', 'reencoded'), workers, progress)
+
+
+def _run_pool(process_one, filenames: List[str], summary: Dict, done_statuses: Sequence[str],
+              workers: int, progress) -> Dict:
+    """
+    Run process_one over filenames on a thread pool and tally the results.
+
+    process_one returns (status, bytes_read, bytes_written); each status
+    must be a key of summary. Byte counts and throughput are added, with
+    images_per_sec counting the images that ended in done_statuses.
+
+    Only PENDING_PER_WORKER images per worker are queued at a time, and
+    more are submitted as they finish, so huge directories do not create
+    a future per file up front.
+    """
+    summary.update(bytes_read=0, bytes_written=0)
+    start = time.monotonic()
+    workers = max(1, workers)
+    names = iter(filenames)
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(process_one, name) for name in islice(names, PENDING_PER_WORKER * workers)}
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            pending |= {pool.submit(process_one, name) for name in islice(names, len(finished))}
+            for future in finished:
+                status, bytes_read, bytes_written = future.result()
+                summary[status] += 1
+                summary['bytes_read'] += bytes_read
+                summary['bytes_written'] += bytes_written
+                done += 1
+                if progress is not None:
+                    progress.update(done, summary['bytes_read'])
+    if progress is not None:
+        progress.finish()
+
+    elapsed = max(time.monotonic() - start, 1e-6)
+    summary['elapsed'] = elapsed
+    summary['images_per_sec'] = sum(summary[status] for status in done_statuses) / elapsed
+    summary['mb_per_sec'] = summary['bytes_read'] / elapsed / 1e6
+    return summary
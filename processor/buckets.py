@@ -0,0 +1,133 @@
+"""
+Aspect-ratio bucketing for ImageUnity datasets.
+"""
+
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; fall back to a pure-Python pass
+    np = None
+
+from .batch import RATIOS, RATIO_TOLERANCE
+
+# Bucket for images that match none of the presets
+UNMATCHED_BUCKET = 'other'
+
+
+def classify_ratios(widths: Sequence[int], heights: Sequence[int],
+                    ratios: Dict[str, Tuple[int, int]] = RATIOS,
+                    tolerance: float = RATIO_TOLERANCE) -> List[str]:
+    """
+    Assign each (width, height) pair to the closest aspect-ratio preset.
+
+    With NumPy available all images are classified in one vectorized pass:
+    the distance from every image ratio to every preset is computed as a
+    single (images x presets) array.
+
+    Args:
+        widths: Image widths
+        heights: Image heights (same length as widths)
+        ratios: Preset name -> (width, height) ratio
+        tolerance: Maximum ratio difference for a match
+
+    Returns:
+        Bucket name per image, UNMATCHED_BUCKET where no preset is close enough
+    """
+    keys = list(ratios)
+    targets = [ratios[k][0] / ratios[k][1] for k in keys]
+    if not widths:
+        return []
+
+    if np is not None:
+        image_ratios = np.asarray(widths, dtype=np.float64) / np.asarray(heights, dtype=np.float64)
+        distances = np.abs(image_ratios[:, None] - np.asarray(targets)[None, :])
+        best = distances.argmin(axis=1)
+        matched = distances[np.arange(len(best)), best] < tolerance
+        names = np.asarray(keys + [UNMATCHED_BUCKET], dtype=object)
+        return names[np.where(matched, best, len(keys))].tolist()
+
+    buckets = []
+    for width, height in zip(widths, heights):
+        ratio = width / height
+        distance, key = min((abs(ratio - t), k) for t, k in zip(targets, keys))
+        buckets.append(key if distance < tolerance else UNMATCHED_BUCKET)
+    return buckets
+
+
+class BucketIndex:
+    """
+    Aspect-ratio buckets for every image in a directory.
+
+    The bucket of every file is remembered, so when the directory index
+    reports changes only the added, removed or rewritten files are read
+    and reclassified. Everything is recomputed only if the index can no
+    longer list what changed since the last call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._buckets: Dict[str, List[str]] = {}
+        # Bucket of every classified filename
+        self._keys: Dict[str, str] = {}
+
+    def get(self, processor) -> Dict[str, List[str]]:
+        """
+        Return the filenames per bucket, recomputing if the directory changed.
+
+        Args:
+            processor: ImageProcessor for the directory
+
+        Returns:
+            Dict of bucket name -> sorted filenames; every preset is present
+        """
+        with self._lock:
+            changed = None
+            if self._version is not None:
+                changed, version = processor.index.changes_since(self._version)
+            if changed is None:
+                names, version = processor.index.snapshot()
+                self._buckets = self._compute(processor, names)
+            elif changed:
+                self._buckets = self._update(processor, changed)
+            self._version = version
+            return self._buckets
+
+    def _classify(self, processor, names: Iterable[str]) -> List[Tuple[str, str]]:
+        """Read and classify images; returns (filename, bucket) for those still present."""
+        details = processor.get_images_details(sorted(names))
+        widths = [info['width'] for info in details]
+        heights = [info['height'] for info in details]
+        return [(info['filename'], key) for info, key in zip(details, classify_ratios(widths, heights))]
+
+    def _compute(self, processor, names: List[str]) -> Dict[str, List[str]]:
+        buckets: Dict[str, List[str]] = {key: [] for key in list(RATIOS) + [UNMATCHED_BUCKET]}
+        self._keys = {}
+        for name, key in self._classify(processor, names):
+            buckets[key].append(name)
+            self._keys[name] = key
+        return buckets
+
+    def _update(self, processor, changed: Iterable[str]) -> Dict[str, List[str]]:
+        # Copy the touched bucket lists; callers may still hold the old ones
+        buckets = dict(self._buckets)
+        copied = set()
+
+        def bucket(key: str) -> List[str]:
+            if key not in copied:
+                buckets[key] = list(buckets[key])
+                copied.add(key)
+            return buckets[key]
+
+        for name in changed:
+            key = self._keys.pop(name, None)
+            if key is not None:
+                names = bucket(key)
+                del names[bisect.bisect_left(names, name)]
+        for name, key in self._classify(processor, changed):
+            bisect.insort(bucket(key), name)
+            self._keys[name] = key
+        return buckets
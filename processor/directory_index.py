@@ -0,0 +1,395 @@
+"""
+In-memory directory index for ImageUnity.
+"""
+
+import bisect
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from .events import EventBus
+
+# Number of per-file changes remembered for changes_since()
+CHANGE_LOG_SIZE = 10000
+
+
+class DirectoryIndex:
+    """
+    Sorted index of the image filenames in a single directory.
+
+    The index is stamped with the directory's mtime when it is scanned.
+    Operations performed by ImageUnity itself update the index in place
+    and re-stamp it, so a rescan only happens when something outside the
+    application has added, removed or renamed files. Each operation
+    passes the mtime taken just before it wrote (see stamp()); if that
+    is not the stamped mtime, the directory also changed some other way
+    and the stamp is left stale, so the next access rescans. Only an
+    external change landing between that mtime being read and our write
+    can go unnoticed, until the directory changes again.
+
+    With an EventBus, every change to the listing is published as an
+    'added', 'removed' or 'modified' event carrying the filename, its
+    position in the sorted listing and the new total count, so clients
+    can patch their copy of the listing in place. Large rescans publish
+    a single 'reset' event instead.
+
+    When a DirectoryWatcher keeps the index live, `watched` is set and the
+    mtime-triggered rescans are skipped; the watcher reports each changed
+    file through sync() instead.
+    """
+
+    def __init__(self, directory: str, extensions: Iterable[str], events: Optional[EventBus] = None):
+        """
+        Initialize the index. The directory is not scanned until first use.
+
+        Args:
+            directory: Directory to index
+            extensions: Lower-case file suffixes (e.g. '.jpg') to include
+            events: Optional bus to publish listing changes on
+        """
+        self.directory = Path(directory)
+        self.extensions = frozenset(extensions)
+        self._names: List[str] = []
+        self._mtime_ns: Optional[int] = None
+        self._lock = threading.RLock()
+        self.events = events
+        self.watched = False
+        # (mtime_ns, size) of files as last written or synced, used to tell
+        # our own writes apart from external changes in sync()
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+        # Bumped whenever an indexed file is added, removed or rewritten
+        self.version = 0
+        # (version, filename) of recent changes; versions after
+        # _changes_from are fully covered
+        self._changes: Deque[Tuple[int, str]] = deque()
+        self._changes_from = 0
+
+    def _matches(self, name: str) -> bool:
+        """Check whether a filename belongs in the index."""
+        # Skip the temp files written during atomic saves
+        if name.startswith('.tmp_'):
+            return False
+        return os.path.splitext(name)[1].lower() in self.extensions
+
+    def _bump(self, names: Iterable[str]) -> None:
+        """Bump the version and log the filenames that changed with it."""
+        self.version += 1
+        for name in names:
+            self._changes.append((self.version, name))
+        while len(self._changes) > CHANGE_LOG_SIZE:
+            self._changes_from = self._changes.popleft()[0]
+
+    def _publish(self, event_type: str, name: Optional[str] = None, index: Optional[int] = None) -> None:
+        """Publish a listing change; called with the lock held so events stay in order."""
+        if self.events is not None:
+            self.events.publish(event_type, filename=name, index=index, count=len(self._names))
+
+    def _dir_mtime_ns(self) -> Optional[int]:
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def _scan(self) -> Set[str]:
+        """Read the directory once and return the matching filenames."""
+        names = set()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if self._matches(entry.name) and entry.is_file():
+                    names.add(entry.name)
+        return names
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Rescan the directory if its mtime changed since the last scan.
+
+        Only the difference between the stored and the scanned names is
+        applied, so the sorted list is not rebuilt for small changes.
+
+        Args:
+            force: Rescan even if the directory mtime is unchanged
+
+        Returns:
+            True if a rescan was performed, False otherwise
+        """
+        with self._lock:
+            if self.watched and not force and self._mtime_ns is not None:
+                return False
+            mtime_ns = self._dir_mtime_ns()
+            if not force and mtime_ns is not None and mtime_ns == self._mtime_ns:
+                return False
+
+            scanned = self._scan()
+            current = set(self._names)
+            removed = current - scanned
+            added = scanned - current
+
+            if len(removed) + len(added) > len(self._names) // 4:
+                self._names = sorted(scanned)
+                if removed or added:
+                    self._publish('reset')
+                    self.version += 1
+                    # Too many changes to list; consumers start over
+                    self._changes.clear()
+                    self._changes_from = self.version
+            else:
+                for name in sorted(removed):
+                    i = bisect.bisect_left(self._names, name)
+                    del self._names[i]
+                    self._publish('removed', name, i)
+                for name in sorted(added):
+                    i = bisect.bisect_left(self._names, name)
+                    self._names.insert(i, name)
+                    self._publish('added', name, i)
+                if removed or added:
+                    self._bump(removed | added)
+
+            self._mtime_ns = mtime_ns
+            return True
+
+    def _position(self, name: str) -> Optional[int]:
+        """Position of an indexed name, or None if it is not indexed."""
+        i = bisect.bisect_left(self._names, name)
+        if i < len(self._names) and self._names[i] == name:
+            return i
+        return None
+
+    def _signature(self, name: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.directory / name)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def stamp(self) -> Optional[int]:
+        """
+        Return the directory mtime; read it right before the application writes.
+
+        Pass the value to add(), discard() or touch() after the write.
+        """
+        return self._dir_mtime_ns()
+
+    def _restamp(self, before: Optional[int]) -> None:
+        """
+        Record the current directory mtime after an operation we made ourselves.
+
+        Only done if the mtime before the operation matches the stamp;
+        otherwise something else changed the directory since the last scan
+        and the stale stamp makes the next access rescan. If the index has
+        never been scanned, leave it unstamped so the next access performs
+        the initial scan.
+        """
+        if self._mtime_ns is not None and before is not None and before == self._mtime_ns:
+            self._mtime_ns = self._dir_mtime_ns()
+
+    def names(self) -> List[str]:
+        """
+        Return the sorted list of indexed filenames.
+
+        Returns:
+            Sorted list of filenames (a copy, safe to modify)
+        """
+        with self._lock:
+            self.refresh()
+            return list(self._names)
+
+    def snapshot(self) -> Tuple[List[str], int]:
+        """
+        Return the sorted filenames together with the index version.
+
+        Returns:
+            Tuple of (filenames, version), read atomically
+        """
+        with self._lock:
+            self.refresh()
+            return list(self._names), self.version
+
+    def changes_since(self, version: int) -> Tuple[Optional[Set[str]], int]:
+        """
+        Return the filenames added, removed or rewritten after a version.
+
+        Args:
+            version: A version previously read from the index
+
+        Returns:
+            Tuple of (changed filenames, current version). The filenames are
+            None if the change log no longer reaches back that far (or a
+            large rescan replaced the listing); start over from snapshot().
+        """
+        with self._lock:
+            self.refresh()
+            if version < self._changes_from:
+                return None, self.version
+            return {name for v, name in self._changes if v > version}, self.version
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.refresh()
+            return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            self.refresh()
+            return self._position(name) is not None
+
+    def page(self, offset: int, limit: int) -> Tuple[List[str], int]:
+        """
+        Return a window of the sorted filenames.
+
+        Args:
+            offset: Position of the first filename to return
+            limit: Maximum number of filenames to return
+
+        Returns:
+            Tuple of (filenames, total number of indexed files)
+        """
+        with self._lock:
+            self.refresh()
+            return self._names[offset:offset + limit], len(self._names)
+
+    def position_after(self, name: str) -> int:
+        """
+        Return the position of the first filename sorting after a given name.
+
+        The name does not need to be indexed, so cursors stay valid when
+        the file they point at is removed.
+
+        Args:
+            name: Filename to position after
+
+        Returns:
+            Offset suitable for page()
+        """
+        with self._lock:
+            self.refresh()
+            return bisect.bisect_right(self._names, name)
+
+    def with_stem(self, stem: str) -> List[str]:
+        """
+        Return the indexed filenames with the given stem (e.g. for a caption).
+
+        Args:
+            stem: Filename without its extension
+
+        Returns:
+            Matching filenames, sorted
+        """
+        with self._lock:
+            self.refresh()
+            prefix = stem + '.'
+            matches = []
+            for name in self._names[bisect.bisect_left(self._names, prefix):]:
+                if not name.startswith(prefix):
+                    break
+                if os.path.splitext(name)[0] == stem:
+                    matches.append(name)
+            return matches
+
+    def sync(self, name: str) -> Optional[str]:
+        """
+        Reconcile one file with the index after an external change was seen.
+
+        Changes the application made itself (through add() or discard())
+        are recognised by the file's mtime and size and ignored.
+
+        Args:
+            name: Filename relative to the indexed directory
+
+        Returns:
+            'added', 'removed' or 'modified' if the index changed, else None
+        """
+        with self._lock:
+            if not self._matches(name):
+                return None
+            signature = self._signature(name)
+            i = self._position(name)
+            if signature is None or not (self.directory / name).is_file():
+                self._signatures.pop(name, None)
+                if i is None:
+                    return None
+                del self._names[i]
+                change = 'removed'
+            elif i is not None and self._signatures.get(name) == signature:
+                return None
+            else:
+                self._signatures[name] = signature
+                if i is None:
+                    i = bisect.bisect_left(self._names, name)
+                    self._names.insert(i, name)
+                    change = 'added'
+                else:
+                    change = 'modified'
+            self._bump([name])
+            self._publish(change, name, i)
+            return change
+
+    def add(self, name: str, before: Optional[int] = None) -> None:
+        """
+        Record that a file was created or overwritten by the application.
+
+        Args:
+            name: Filename relative to the indexed directory
+            before: stamp() read before the write; without it the index
+                rescans on next use
+        """
+        with self._lock:
+            if self._matches(name):
+                i = self._position(name)
+                if i is None:
+                    i = bisect.bisect_left(self._names, name)
+                    self._names.insert(i, name)
+                    self._publish('added', name, i)
+                else:
+                    self._publish('modified', name, i)
+                self._bump([name])
+                signature = self._signature(name)
+                if signature is not None:
+                    self._signatures[name] = signature
+            self._restamp(before)
+
+    def discard(self, name: str, before: Optional[int] = None) -> None:
+        """
+        Record that a file was removed by the application.
+
+        Args:
+            name: Filename relative to the indexed directory
+            before: stamp() read before the removal
+        """
+        with self._lock:
+            self._signatures.pop(name, None)
+            i = self._position(name)
+            if i is not None:
+                del self._names[i]
+                self._bump([name])
+                self._publish('removed', name, i)
+            self._restamp(before)
+
+    def record_write(self, name: str) -> None:
+        """
+        Remember the signature of a non-image file the application wrote.
+
+        is_own_write() then recognises the watcher's report of that write,
+        like sync() does for images.
+
+        Args:
+            name: Filename relative to the indexed directory, e.g. a caption
+        """
+        with self._lock:
+            signature = self._signature(name)
+            if signature is None:
+                self._signatures.pop(name, None)
+            else:
+                self._signatures[name] = signature
+
+    def is_own_write(self, name: str) -> bool:
+        """Check whether a file is unchanged since record_write() saw it."""
+        with self._lock:
+            signature = self._signature(name)
+            return signature is not None and self._signatures.get(name) == signature
+
+    def touch(self, before: Optional[int] = None) -> None:
+        """Record a directory change that does not affect indexed files (see add())."""
+        with self._lock:
+            self._restamp(before)
@@ -0,0 +1,90 @@
+"""
+Change notifications for ImageUnity clients.
+"""
+
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+# Event types published for the image directory
+EVENT_TYPES = ('added', 'removed', 'modified', 'caption-changed', 'reset')
+
+# Events kept for clients that reconnect with a Last-Event-ID
+DEFAULT_HISTORY = 1000
+
+
+class EventBus:
+    """
+    Sequence-numbered, in-memory event log with blocking reads.
+
+    Every event gets an increasing id. Readers remember the last id they
+    saw and ask for everything after it, so a client that reconnects
+    misses nothing as long as the events are still in the history.
+    """
+
+    def __init__(self, max_history: int = DEFAULT_HISTORY):
+        """
+        Initialize an empty event log.
+
+        Args:
+            max_history: Number of recent events kept for replay
+        """
+        self._events: deque = deque(maxlen=max_history)
+        self._last_id = 0
+        self._changed = threading.Condition()
+
+    @property
+    def last_id(self) -> int:
+        """Id of the most recent event (0 if none yet)."""
+        with self._changed:
+            return self._last_id
+
+    def publish(self, event_type: str, **data) -> Dict:
+        """
+        Append an event and wake up waiting readers.
+
+        Args:
+            event_type: One of EVENT_TYPES
+            **data: Event payload, e.g. filename, index and count
+
+        Returns:
+            The event dict, including its id and type
+        """
+        with self._changed:
+            self._last_id += 1
+            event = {'id': self._last_id, 'type': event_type, **data}
+            self._events.append(event)
+            self._changed.notify_all()
+            return event
+
+    def since(self, last_id: int) -> Optional[List[Dict]]:
+        """
+        Return the events after a given id.
+
+        Args:
+            last_id: Id of the last event the reader has seen
+
+        Returns:
+            List of events (possibly empty), or None if some of the events
+            after last_id have already been dropped from the history
+        """
+        with self._changed:
+            return self._since(last_id)
+
+    def _since(self, last_id: int) -> Optional[List[Dict]]:
+        if last_id >= self._last_id:
+            return []
+        if not self._events or self._events[0]['id'] > last_id + 1:
+            return None
+        return [event for event in self._events if event['id'] > last_id]
+
+    def wait(self, last_id: int, timeout: float) -> Optional[List[Dict]]:
+        """
+        Like since(), but block up to timeout seconds for a new event.
+
+        Returns:
+            List of events (empty on timeout), or None if events were missed
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self._last_id > last_id, timeout)
+            return self._since(last_id)
@@ -2,20 +2,189 @@
 Image processing utilities for ImageUnity.
 """
 
+import multiprocessing
 import os
 import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from math import ceil, gcd
 from pathlib import Path
-from typing import List, Optional, Dict
-from PIL import Image
+from typing import Iterable, List, Optional, Dict, Sequence, Tuple
+from PIL import Image, ImageFilter
+
+from .directory_index import DirectoryIndex
+from .locks import FileLocks
+from .lossless import crop_jpeg, find_jpegtran, jpeg_block_size, orient_jpeg, snap_crop
+from .metadata_store import MetadataStore
+from .orientation import EXIF_ORIENTATION_TAG, TRANSPOSED_ORIENTATIONS, apply_orientation, get_exif_orientation
+from .thumbnails import ThumbnailCache
 
 # Supported image extensions
 SUPPORTED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp'}
 
+# Threads used to read image headers for batch metadata requests
+INFO_WORKERS = 8
+
+# Threads used to resize and encode the outputs of one process_image call
+OUTPUT_WORKERS = 4
+
+# Ways of placing an automatic crop: centered, or over the most detailed region
+CROP_MODES = ('center', 'smart')
+
+# Longest edge of the downsampled copy used to find detailed regions
+SALIENCY_SIZE = 256
+
+# Resampling profiles for resizes: (filter, reducing_gap). With a reducing
+# gap, the image is first shrunk by an integer factor with Image.reduce()
+# (a cheap box filter) while it stays at least `gap` times the target size,
+# and only the rest is done with the filter. A gap of 3 is indistinguishable
+# from a plain LANCZOS resize; smaller gaps trade quality for speed.
+RESAMPLE_PROFILES = {
+    'quality': (Image.Resampling.LANCZOS, None),
+    'balanced': (Image.Resampling.LANCZOS, 3.0),
+    'fast': (Image.Resampling.BICUBIC, 2.0),
+}
+DEFAULT_RESAMPLE = 'balanced'
+
+# Encoder settings for outputs, per profile and format. 'balanced' keeps the
+# long-standing quality 95 / library defaults; 'fast' skips the extra
+# passes and, for JPEG, drops to quality 85 with 4:2:0 chroma (fewer
+# coefficients to entropy-code), 'small' spends CPU time on smaller files,
+# and 'lossless' keeps every pixel (JPEG gets as close as it can: quality
+# 100, no subsampling).
+ENCODER_PROFILES = {
+    'fast': {
+        'jpeg': {'quality': 85, 'optimize': False, 'progressive': False, 'subsampling': '4:2:0'},
+        'png': {'compress_level': 1},
+        'webp': {'quality': 95, 'method': 0},
+    },
+    'balanced': {
+        'jpeg': {'quality': 95},
+        'png': {'compress_level': 6},
+        'webp': {'quality': 95, 'method': 4},
+    },
+    'small': {
+        'jpeg': {'quality': 90, 'optimize': True, 'progressive': True, 'subsampling': '4:2:0'},
+        'png': {'compress_level': 9, 'optimize': True},
+        'webp': {'quality': 90, 'method': 6},
+    },
+    'lossless': {
+        'jpeg': {'quality': 100, 'subsampling': '4:4:4'},
+        'png': {'compress_level': 9},
+        'webp': {'lossless': True, 'quality': 100, 'method': 6},
+    },
+}
+DEFAULT_ENCODER = 'balanced'
+
+# Output extensions and the ENCODER_PROFILES format they use
+ENCODER_FORMATS = {'.jpg': 'jpeg', '.jpeg': 'jpeg', '.png': 'png', '.webp': 'webp'}
+
+# Default MetadataCache capacity, in images
+DEFAULT_CACHE_ENTRIES = 10000
+
+# Minimum ratio between a reduced-scale JPEG decode and the largest output
+# resized from it, so the final LANCZOS pass still downsamples
+DRAFT_MARGIN = 2
+
+# Permissions requested for new outputs; the kernel applies the umask
+DEFAULT_FILE_MODE = 0o666
+
+
+class MetadataCache:
+    """
+    Thread-safe LRU cache for image info.
+    
+    Entries are keyed by filename and only served while the file's
+    st_mtime_ns and st_size still match the values they were stored with.
+    """
+    
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Number of entries kept before evicting the least recently used
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, filename: str, stat: os.stat_result) -> Optional[Dict]:
+        """
+        Look up cached info for a file.
+        
+        Args:
+            filename: The image filename
+            stat: Current stat result of the image file
+            
+        Returns:
+            Copy of the cached info dict, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is None or entry[0] != (stat.st_mtime_ns, stat.st_size):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(filename)
+            self.hits += 1
+            return dict(entry[1])
+    
+    def put(self, filename: str, stat: os.stat_result, info: Dict) -> None:
+        """
+        Store info for a file.
+        
+        Args:
+            filename: The image filename
+            stat: Stat result the info was computed from
+            info: Info dict to cache
+        """
+        with self._lock:
+            self._entries[filename] = ((stat.st_mtime_ns, stat.st_size), dict(info))
+            self._entries.move_to_end(filename)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, filename: str) -> None:
+        """Drop the cached info for a file, if any."""
+        with self._lock:
+            self._entries.pop(filename, None)
+    
+    def clear(self) -> None:
+        """Drop all cached info."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        """
+        Get cache counters for monitoring.
+        
+        Returns:
+            Dict with hits, misses, entries and max_entries
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
+
 
 class ImageProcessor:
     """Handles image operations: listing, scaling, cropping, and trash management."""
     
-    def __init__(self, image_dir: str, trash_dir: Optional[str] = None, copy_mode: bool = False):
+    def __init__(self, image_dir: str, trash_dir: Optional[str] = None, copy_mode: bool = False,
+                 index: Optional[DirectoryIndex] = None,
+                 metadata_cache: Optional[MetadataCache] = None,
+                 metadata_store: Optional[MetadataStore] = None,
+                 thumbnails: Optional[ThumbnailCache] = None,
+                 encode_pool: Optional[Executor] = None,
+                 locks: Optional[FileLocks] = None,
+                 encoder: str = DEFAULT_ENCODER):
         """
         Initialize the image processor.
         
@@ -23,23 +192,66 @@ class ImageProcessor:
             image_dir: Directory containing images
             trash_dir: Optional directory for trashed images
             copy_mode: If True, save copies instead of overwriting originals
+            index: Optional shared directory index (one is created if omitted)
+            metadata_cache: Optional shared image info cache (one is created if omitted)
+            metadata_store: Optional persistent metadata database
+            thumbnails: Optional thumbnail cache
+            encode_pool: Optional process pool for resizing and encoding outputs
+            locks: Optional shared per-file locks (created if omitted)
+            encoder: Default ENCODER_PROFILES entry for outputs
         """
         self.image_dir = Path(image_dir)
         self.trash_dir = Path(trash_dir) if trash_dir else None
         self.copy_mode = copy_mode
+        self.index = index if index is not None else DirectoryIndex(image_dir, SUPPORTED_EXTENSIONS)
+        self.metadata_cache = metadata_cache if metadata_cache is not None else MetadataCache()
+        self.metadata_store = metadata_store
+        self.thumbnails = thumbnails
+        self.encode_pool = encode_pool
+        self.locks = locks if locks is not None else FileLocks()
+        if encoder not in ENCODER_PROFILES:
+            raise ValueError(f"Unknown encoder profile: {encoder}")
+        self.encoder = encoder
     
     def list_images(self) -> List[str]:
         """
         List all supported image files in the directory.
         
+        Served from the directory index, which only rescans the directory
+        when it was changed by something other than this processor.
+        
         Returns:
             Sorted list of image filenames
         """
-        images = []
-        for f in self.image_dir.iterdir():
-            if f.is_file() and f.suffix.lower() in SUPPORTED_EXTENSIONS:
-                images.append(f.name)
-        return sorted(images)
+        return self.index.names()
+    
+    def list_images_page(self, offset: int, limit: int) -> Tuple[List[str], int]:
+        """
+        List a window of the sorted image filenames.
+        
+        Args:
+            offset: Position of the first image to return
+            limit: Maximum number of images to return
+            
+        Returns:
+            Tuple of (image filenames, total image count)
+        """
+        return self.index.page(offset, limit)
+    
+    def list_images_after(self, filename: str, limit: int) -> Tuple[List[str], int, int]:
+        """
+        List the images sorting after a given filename.
+        
+        Args:
+            filename: Filename to continue after (need not exist any more)
+            limit: Maximum number of images to return
+            
+        Returns:
+            Tuple of (image filenames, offset of the first one, total image count)
+        """
+        offset = self.index.position_after(filename)
+        images, total = self.index.page(offset, limit)
+        return images, offset, total
     
     def is_valid_filename(self, filename: str) -> bool:
         """
@@ -72,31 +284,195 @@ class ImageProcessor:
         """
         Get image dimensions and metadata.
         
+        Only the image header is read. Dimensions are reported as displayed,
+        i.e. swapped for EXIF orientations that rotate by 90 or 270 degrees,
+        without decoding any pixel data. Results are cached (and persisted to
+        the metadata store, if configured) until the file's mtime or size
+        changes, or an operation on it invalidates them. has_caption is
+        checked again on every call, as taggers write caption files without
+        touching the image.
+        
         Args:
             filename: The image filename
             
         Returns:
-            Dict with width, height, format, size, or None if error
+            Dict with width, height, format, size, orientation, or None if error
         """
         image_path = self.get_image_path(filename)
-        if not image_path.exists():
+        try:
+            stat = image_path.stat()
+        except OSError:
+            return None
+        
+        info = self.metadata_cache.get(filename, stat)
+        if info is not None:
+            info['has_caption'] = self._has_caption(filename)
+            return info
+        
+        if self.metadata_store is not None:
+            info = self.metadata_store.get(filename, stat)
+            if info is not None:
+                info['has_caption'] = self._has_caption(filename)
+                self.metadata_cache.put(filename, stat, info)
+                return info
+        
+        info = self._read_image_info(filename, image_path, stat)
+        if info is None:
             return None
         
+        self.metadata_cache.put(filename, stat, info)
+        if self.metadata_store is not None:
+            self.metadata_store.put(info, stat)
+        return dict(info)
+    
+    def get_images_details(self, filenames: List[str], max_workers: int = INFO_WORKERS) -> List[Dict]:
+        """
+        Get metadata for many images at once.
+        
+        Files are stat'ed and their headers read in parallel on a thread
+        pool. With a metadata store configured, all stored rows are fetched
+        in a single query and only missing or stale ones are read from disk.
+        
+        Args:
+            filenames: Image filenames
+            max_workers: Number of threads reading files concurrently
+            
+        Returns:
+            List of info dicts, in input order, skipping unreadable images
+        """
+        if self.metadata_store is None:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                infos = list(pool.map(self.get_image_info, filenames))
+            return [info for info in infos if info is not None]
+        
+        stored = self.metadata_store.get_many(filenames)
+        
+        def lookup(filename):
+            image_path = self.get_image_path(filename)
+            try:
+                stat = image_path.stat()
+            except OSError:
+                return None, None
+            
+            row = stored.get(filename)
+            if row is not None and row[0] == (stat.st_mtime_ns, stat.st_size):
+                info = row[1]
+                info['has_caption'] = self._has_caption(filename)
+                self.metadata_cache.put(filename, stat, info)
+                return info, None
+            
+            info = self._read_image_info(filename, image_path, stat)
+            if info is None:
+                return None, None
+            self.metadata_cache.put(filename, stat, info)
+            return info, stat
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(lookup, filenames))
+        
+        self.metadata_store.put_many((info, stat) for info, stat in results if stat is not None)
+        return [info for info, _ in results if info is not None]
+    
+    def _read_image_info(self, filename: str, image_path: Path, stat: os.stat_result) -> Optional[Dict]:
+        """Read image info from the file header, bypassing all caches."""
         try:
             with Image.open(image_path) as img:
-                # Handle EXIF orientation
-                img = self._apply_exif_orientation(img)
-                caption_path = self.image_dir / f"{Path(filename).stem}.txt"
-                return {
+                orientation = get_exif_orientation(img)
+                width, height = img.size
+                if orientation in TRANSPOSED_ORIENTATIONS:
+                    width, height = height, width
+                info = {
                     'filename': filename,
-                    'width': img.width,
-                    'height': img.height,
+                    'width': width,
+                    'height': height,
                     'format': img.format or 'Unknown',
-                    'size': image_path.stat().st_size,
-                    'has_caption': caption_path.exists()
+                    'size': stat.st_size,
+                    'orientation': orientation,
+                    'has_caption': self._has_caption(filename)
                 }
         except Exception:
             return None
+        return info
+    
+    def _has_caption(self, filename: str) -> bool:
+        """Check whether the caption file of an image exists."""
+        return (self.image_dir / f"{Path(filename).stem}.txt").exists()
+
+    def _invalidate_cached(self, filename: str) -> None:
+        """Forget cached metadata and thumbnails for a file after changing it."""
+        self.metadata_cache.invalidate(filename)
+        if self.metadata_store is not None:
+            self.metadata_store.delete(filename)
+        if self.thumbnails is not None:
+            self.thumbnails.invalidate(filename)
+    
+    def apply_external_changes(self, names: Iterable[str]) -> None:
+        """
+        Bring the index and caches up to date with files changed by other tools.
+        
+        Called by the directory watcher. Image changes update the index
+        (which publishes the change) and drop cached metadata and
+        thumbnails; caption changes drop the cached info of the captioned
+        images, whose has_caption flag may have changed. Files still as
+        the application last wrote them are skipped.
+        
+        Args:
+            names: Filenames (images or captions) that were created,
+                modified or deleted
+        """
+        for name in names:
+            if name.startswith('.tmp_'):
+                continue
+            path = Path(name)
+            if path.suffix.lower() == '.txt':
+                if self.index.is_own_write(name):
+                    continue
+                for image in self.index.with_stem(path.stem):
+                    self._invalidate_cached(image)
+                    if self.index.events is not None:
+                        self.index.events.publish('caption-changed', filename=image)
+            elif self.index.sync(name) is not None:
+                self._invalidate_cached(name)
+    
+    def get_thumbnail(self, filename: str, size: int, fmt: str = 'jpeg') -> Optional[Path]:
+        """
+        Get a cached, downscaled preview of an image.
+        
+        Args:
+            filename: The image filename
+            size: Maximum width and height of the thumbnail
+            fmt: Thumbnail format ('jpeg' or 'webp')
+            
+        Returns:
+            Path to the thumbnail file, or None if error
+        """
+        return self.get_preview(filename, size, size, fmt)
+    
+    def get_preview(self, filename: str, width: int, height: int, fmt: str = 'jpeg') -> Optional[Path]:
+        """
+        Get a cached rendition of an image that fits a bounding box.
+        
+        The EXIF orientation is applied, so the rendition has the same
+        aspect ratio as the dimensions reported by get_image_info.
+        
+        Args:
+            filename: The image filename
+            width: Maximum width of the rendition
+            height: Maximum height of the rendition
+            fmt: Rendition format ('jpeg' or 'webp')
+            
+        Returns:
+            Path to the rendition file, or None if error
+        """
+        if self.thumbnails is None:
+            return None
+        try:
+            return self.thumbnails.get(self.get_image_path(filename), (width, height), fmt)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error creating preview: {e}")
+            return None
 
     def get_caption(self, filename: str) -> str:
         """
@@ -127,29 +503,82 @@ class ImageProcessor:
         Returns:
             True if successful, False otherwise
         """
-        caption_path = self.image_dir / f"{Path(filename).stem}.txt"
-        try:
-            caption_path.write_text(text, encoding='utf-8')
-            return True
-        except Exception as e:
-            print(f"Error saving caption: {e}")
-            return False
+        with self.locks.hold(filename):
+            caption_path = self.image_dir / f"{Path(filename).stem}.txt"
+            try:
+                before = self.index.stamp()
+                caption_path.write_text(text, encoding='utf-8')
+                self.index.touch(before)
+                # So the watcher does not report our own write again
+                self.index.record_write(caption_path.name)
+                self._invalidate_cached(filename)
+                if self.index.events is not None:
+                    self.index.events.publish('caption-changed', filename=filename)
+                return True
+            except Exception as e:
+                print(f"Error saving caption: {e}")
+                return False
     
-    def _apply_exif_orientation(self, img: Image.Image) -> Image.Image:
-        """Apply EXIF orientation to image."""
-        try:
-            exif = img.getexif()
-            orientation = exif.get(274)  # 274 is the orientation tag
+    def normalize_orientation(self, filename: str) -> Optional[str]:
+        """
+        Bake the EXIF orientation into the pixels and mark the image upright.
+        
+        Every later open of the file then skips the transpose. JPEGs are
+        transformed losslessly with jpegtran when it is installed and the
+        image size allows it (see orient_jpeg); otherwise the image is
+        decoded, transposed and re-encoded with the orientation tag
+        removed and the rest of its EXIF data kept. The file is replaced
+        in place, so in copy mode, where originals are never overwritten,
+        rotated images are left alone.
+        
+        Args:
+            filename: The image filename
             
-            if orientation == 3:
-                img = img.rotate(180, expand=True)
-            elif orientation == 6:
-                img = img.rotate(270, expand=True)
-            elif orientation == 8:
-                img = img.rotate(90, expand=True)
-        except Exception:
-            pass
-        return img
+        Returns:
+            'lossless' or 'reencoded' for how the image was normalized,
+            'upright' if there was nothing to do, 'skipped' in copy mode,
+            or None if error
+        """
+        with self.locks.hold(filename):
+            image_path = self.get_image_path(filename)
+            if not image_path.exists():
+                return None
+            
+            try:
+                with Image.open(image_path) as img:
+                    orientation = get_exif_orientation(img)
+                    is_jpeg = img.format == 'JPEG'
+                if orientation == 1:
+                    return 'upright'
+                if self.copy_mode:
+                    return 'skipped'
+                
+                method = None
+                before = self.index.stamp()
+                jpegtran = find_jpegtran() if is_jpeg else None
+                if jpegtran is not None:
+                    try:
+                        orient_jpeg(image_path, image_path, orientation, jpegtran)
+                        method = 'lossless'
+                    except RuntimeError as e:
+                        # Typically edge blocks that cannot be moved losslessly
+                        print(f"Lossless orientation failed for {filename}, re-encoding: {e}")
+                if method is None:
+                    with Image.open(image_path) as img:
+                        exif = img.getexif()
+                        del exif[EXIF_ORIENTATION_TAG]
+                        upright = apply_orientation(img, orientation)
+                        save_image(upright, image_path, self.encoder, exif=exif.tobytes() if len(exif) else None)
+                    method = 'reencoded'
+                
+                self._invalidate_cached(filename)
+                self.index.add(filename, before)
+                # Store the upright info right away, so listings see orientation 1
+                self.get_image_info(filename)
+                return method
+            except Exception as e:
+                print(f"Error normalizing orientation: {e}")
+                return None
     
     def _generate_output_path(self, filename: str, suffix: str) -> Path:
         """
@@ -172,7 +601,30 @@ class ImageProcessor:
         else:
             return self.image_dir / filename
     
-    def scale_image(self, filename: str, width: int, height: int) -> Optional[str]:
+    @staticmethod
+    def create_encode_pool(workers: int) -> ProcessPoolExecutor:
+        """
+        Create a process pool suitable for the encode_pool argument.
+        
+        Workers are spawned rather than forked, since the pool is usually
+        created inside a multi-threaded server.
+        
+        Args:
+            workers: Number of worker processes
+            
+        Returns:
+            ProcessPoolExecutor
+        """
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    
+    def _crop_suffix(self, width: int, height: int) -> str:
+        """Suffix for copy-mode crop outputs, named after the aspect ratio."""
+        g = gcd(width, height)
+        return f'_crop_{width // g}-{height // g}'
+    
+    def scale_image(self, filename: str, width: int, height: int,
+                    resample: str = DEFAULT_RESAMPLE, encoder: Optional[str] = None,
+                    stats: Optional[List[Dict]] = None) -> Optional[str]:
         """
         Scale image to specified dimensions.
         
@@ -180,36 +632,19 @@ class ImageProcessor:
             filename: The image filename
             width: Target width
             height: Target height
+            resample: Name of a RESAMPLE_PROFILES entry
+            encoder: ENCODER_PROFILES entry (default: the processor's)
+            stats: Optional list to receive encode statistics (see process_image)
             
         Returns:
             Output filename, or None if error
         """
-        image_path = self.get_image_path(filename)
-        if not image_path.exists():
-            return None
-        
-        try:
-            with Image.open(image_path) as img:
-                img = self._apply_exif_orientation(img)
-                
-                # Use LANCZOS for high-quality scaling
-                scaled = img.resize((width, height), Image.Resampling.LANCZOS)
-                
-                # Determine output path
-                if self.copy_mode:
-                    output_path = self._generate_output_path(filename, f'_{width}x{height}')
-                else:
-                    output_path = image_path
-                
-                # Save using helper to handle transparency
-                self._save_image(scaled, output_path, quality=95)
-                
-                return output_path.name
-        except Exception as e:
-            print(f"Error scaling image: {e}")
-            return None
+        outputs = self.process_image(filename, sizes=[(width, height)], resample=resample,
+                                     encoder=encoder, stats=stats)
+        return outputs[-1] if outputs else None
     
-    def crop_image(self, filename: str, x: int, y: int, width: int, height: int) -> Optional[str]:
+    def crop_image(self, filename: str, x: int, y: int, width: int, height: int,
+                   encoder: Optional[str] = None, stats: Optional[List[Dict]] = None) -> Optional[str]:
         """
         Crop image to specified region.
         
@@ -219,84 +654,260 @@ class ImageProcessor:
             y: Top edge of crop region
             width: Width of crop region
             height: Height of crop region
+            encoder: ENCODER_PROFILES entry (default: the processor's)
+            stats: Optional list to receive encode statistics (see process_image)
             
         Returns:
             Output filename, or None if error
         """
-        image_path = self.get_image_path(filename)
-        if not image_path.exists():
+        outputs = self.process_image(filename, crop=(x, y, width, height), encoder=encoder, stats=stats)
+        return outputs[-1] if outputs else None
+    
+    def crop_image_lossless(self, filename: str, x: int, y: int, width: int,
+                            height: int) -> Optional[Tuple[str, Tuple[int, int, int, int]]]:
+        """
+        Crop a JPEG losslessly, snapping the region to the JPEG block grid.
+        
+        The compressed data is cut with jpegtran instead of being decoded
+        and re-encoded, so there is no generation loss and almost no CPU
+        cost. The top-left corner moves up and left to the nearest 8 or 16
+        pixel block boundary (depending on chroma subsampling). Outputs are
+        named as for crop_image, after the requested size.
+        
+        Args:
+            filename: The image filename
+            x: Left edge of crop region
+            y: Top edge of crop region
+            width: Width of crop region
+            height: Height of crop region
+            
+        Returns:
+            Tuple of (output filename, snapped (x, y, width, height)), or
+            None if the image is not an upright JPEG, jpegtran is not
+            installed or the crop fails; crop_image still works then
+        """
+        jpegtran = find_jpegtran()
+        if jpegtran is None:
             return None
         
-        try:
-            with Image.open(image_path) as img:
-                img = self._apply_exif_orientation(img)
-                
-                # Validate crop region
-                if x < 0 or y < 0 or x + width > img.width or y + height > img.height:
-                    return None
-                
-                # Crop the image
-                cropped = img.crop((x, y, x + width, y + height))
+        with self.locks.hold(filename):
+            image_path = self.get_image_path(filename)
+            if not image_path.exists():
+                return None
+            
+            try:
+                with Image.open(image_path) as img:
+                    # Crops are given in displayed pixels; only upright
+                    # images store them the same way
+                    if img.format != 'JPEG' or get_exif_orientation(img) != 1:
+                        return None
+                    if width <= 0 or height <= 0 or x < 0 or y < 0 \
+                            or x + width > img.width or y + height > img.height:
+                        return None
+                    region = snap_crop((x, y, width, height), jpeg_block_size(img))
                 
-                # Determine output path
                 if self.copy_mode:
-                    # Calculate aspect ratio for suffix
-                    from math import gcd
-                    g = gcd(width, height)
-                    ratio = f"{width // g}-{height // g}"
-                    output_path = self._generate_output_path(filename, f'_crop_{ratio}')
+                    output_path = self._generate_output_path(filename, self._crop_suffix(width, height))
                 else:
                     output_path = image_path
+                before = self.index.stamp()
+                crop_jpeg(image_path, output_path, region, jpegtran)
                 
-                # Save using helper to handle transparency
-                self._save_image(cropped, output_path, quality=95)
-                
-                return output_path.name
-        except Exception as e:
-            print(f"Error cropping image: {e}")
-            return None
+                self._invalidate_cached(output_path.name)
+                self.index.add(output_path.name, before)
+                return output_path.name, region
+            except Exception as e:
+                print(f"Error cropping image losslessly: {e}")
+                return None
     
-    def _save_image(self, img: Image.Image, output_path: Path, quality: int = 95) -> None:
+    def process_image(self, filename: str, crop: Optional[Tuple[int, int, int, int]] = None,
+                      sizes: Sequence[Tuple[int, int]] = (),
+                      crop_ratio: Optional[Tuple[int, int]] = None,
+                      crop_mode: str = 'center',
+                      resample: str = DEFAULT_RESAMPLE,
+                      encoder: Optional[str] = None,
+                      stats: Optional[List[Dict]] = None) -> Optional[List[str]]:
         """
-        Save image with proper handling of alpha channel for JPEG.
+        Crop and/or scale an image to several sizes with a single decode.
+        
+        The source is decoded and oriented once, the crop is applied once,
+        and every target size is resized and encoded from that in-memory
+        image, with outputs written concurrently. JPEGs much larger than
+        every output are decoded at reduced scale (see _draft_for_outputs).
+        
+        In copy mode the crop is saved as `stem_crop_W-H.ext` and each size
+        as `<crop or source stem>_WxH.ext`. In destructive mode the source
+        is overwritten once, with the last size (or the crop if no sizes
+        are given).
+        
+        Instead of an explicit region, crop_ratio picks the largest crop of
+        that aspect ratio automatically, placed according to crop_mode (see
+        auto_crop_box). The box is computed from the already decoded image.
         
         Args:
-            img: PIL Image object
-            output_path: Path to save the image to
-            quality: JPG quality (if applicable)
-        """
-        target_ext = output_path.suffix.lower()
-        
-        if target_ext in {'.jpg', '.jpeg'}:
-            if img.mode in ("RGBA", "P"):
-                # Convert to RGBA first to handle palette images with transparency
-                img = img.convert("RGBA")
-                # Create white background
-                new_img = Image.new("RGB", img.size, (255, 255, 255))
-                # Paste using alpha channel as mask
-                new_img.paste(img, mask=img.split()[3])
-                img = new_img
-            elif img.mode == "LA":
-                new_img = Image.new("RGB", img.size, (255, 255, 255))
-                # LA uses index 1 for alpha
-                new_img.paste(img, mask=img.split()[1])
-                img = new_img
-            elif img.mode != "RGB":
-                img = img.convert("RGB")
+            filename: The image filename
+            crop: Optional (x, y, width, height) region, in displayed pixels
+            sizes: Target (width, height) pairs
+            crop_ratio: Optional (width, height) ratio to crop to automatically
+            crop_mode: 'center' or 'smart' placement for crop_ratio
+            resample: Name of a RESAMPLE_PROFILES entry, used for the sizes
+            encoder: ENCODER_PROFILES entry (default: the processor's)
+            stats: Optional list; on success a dict per output is appended,
+                with filename, bytes, encode_ms (encoding and writing) and
+                resize_ms
+            
+        Returns:
+            Output filenames in the order written (crop first), or None if error
+        """
+        encoder = encoder or self.encoder
+        if crop is None and crop_ratio is None and not sizes:
+            return None
+        if crop_mode not in CROP_MODES or resample not in RESAMPLE_PROFILES \
+                or encoder not in ENCODER_PROFILES:
+            return None
+        
+        # Concurrent edits of one file are serialized; other files proceed
+        with self.locks.hold(filename):
+            image_path = self.get_image_path(filename)
+            if not image_path.exists():
+                return None
+            
+            try:
+                with Image.open(image_path) as img:
+                    # Full-resolution size as displayed; crops are given in these pixels
+                    orientation = get_exif_orientation(img)
+                    full_width, full_height = img.size
+                    if orientation in TRANSPOSED_ORIENTATIONS:
+                        full_width, full_height = full_height, full_width
+                    scale = self._draft_for_outputs(img, (full_width, full_height), crop, sizes, crop_ratio)
+                    
+                    # A no-op for upright (or normalized) images
+                    img = apply_orientation(img, orientation)
+                    # Decode once up front; the output jobs share this image
+                    img.load()
+                    
+                    if crop is None and crop_ratio is not None:
+                        # Computed on the decoded image, so already at its scale
+                        region = auto_crop_box(img, crop_ratio, crop_mode)
+                    elif crop is not None:
+                        x, y, width, height = crop
+                        # Validate crop region
+                        if width <= 0 or height <= 0 or x < 0 or y < 0 \
+                                or x + width > full_width or y + height > full_height:
+                            return None
+                        region = crop
+                        if scale > 1:
+                            region = self._scale_region(crop, scale, img.size)
+                    else:
+                        region = None
+                    
+                    jobs = []
+                    base_name = filename
+                    if region is not None:
+                        x, y, width, height = region
+                        img = img.crop((x, y, x + width, y + height))
+                        
+                        if self.copy_mode:
+                            crop_path = self._generate_output_path(filename, self._crop_suffix(width, height))
+                            base_name = crop_path.name
+                            jobs.append((img, None, crop_path, resample, encoder))
+                        elif not sizes:
+                            jobs.append((img, None, image_path, resample, encoder))
+                    
+                    if self.copy_mode:
+                        for width, height in sizes:
+                            output_path = self._generate_output_path(base_name, f'_{width}x{height}')
+                            jobs.append((img, (width, height), output_path, resample, encoder))
+                    elif sizes:
+                        jobs.append((img, tuple(sizes[-1]), image_path, resample, encoder))
+                    
+                    before = self.index.stamp()
+                    if len(jobs) == 1:
+                        results = [render_output(*jobs[0])]
+                    elif self.encode_pool is not None:
+                        # Fan resize+encode out to worker processes; the decoded
+                        # image is pickled to each worker
+                        futures = [self.encode_pool.submit(render_output, *job) for job in jobs]
+                        results = [future.result() for future in futures]
+                    else:
+                        # Pillow releases the GIL while resizing and encoding
+                        with ThreadPoolExecutor(max_workers=min(len(jobs), OUTPUT_WORKERS)) as pool:
+                            results = list(pool.map(lambda job: render_output(*job), jobs))
                 
-        # Atomic save: save to temp file first, then replace original
-        temp_path = output_path.parent / f".tmp_{output_path.name}"
-        try:
-            img.save(temp_path, quality=quality)
-            os.replace(temp_path, output_path)
-        except Exception as e:
-            if temp_path.exists():
-                try:
-                    temp_path.unlink()
-                except Exception:
-                    pass
-            raise e
-
+                outputs = []
+                for job, result in zip(jobs, results):
+                    output_path = job[2]
+                    # Invalidate before the index publishes the change
+                    self._invalidate_cached(output_path.name)
+                    self.index.add(output_path.name, before)
+                    outputs.append(output_path.name)
+                    if stats is not None:
+                        stats.append(dict(result, filename=output_path.name))
+                return outputs
+            except Exception as e:
+                print(f"Error processing image: {e}")
+                return None
+    
+    def _draft_for_outputs(self, img: Image.Image, full_size: Tuple[int, int],
+                           crop: Optional[Tuple[int, int, int, int]], sizes: Sequence[Tuple[int, int]],
+                           crop_ratio: Optional[Tuple[int, int]]) -> int:
+        """
+        Set up a reduced-scale decode when every output is much smaller.
+        
+        libjpeg can scale JPEGs by 1/2, 1/4 or 1/8 while decoding (DCT
+        scaling), which skips most of the decode work and the full-size
+        buffer. The largest scale is used that still leaves the region
+        being resized at least DRAFT_MARGIN times each output size, so the
+        final LANCZOS pass gives the same result as from full resolution.
+        Nothing changes when a full-size crop is written (copy mode) or
+        the source is not a JPEG.
+        
+        Args:
+            img: Freshly opened, not yet loaded PIL Image
+            full_size: Displayed (width, height) of the source
+            crop: Optional (x, y, width, height) region, in displayed pixels
+            sizes: Target (width, height) pairs
+            crop_ratio: Optional (width, height) ratio to crop to automatically
+            
+        Returns:
+            The reduction factor applied, 1 for a full-size decode
+        """
+        if img.format != 'JPEG' or not sizes:
+            return 1
+        if self.copy_mode and (crop is not None or crop_ratio is not None):
+            return 1
+        
+        if crop is not None:
+            region_width, region_height = crop[2], crop[3]
+        elif crop_ratio is not None:
+            # Smart crops only move the box, so the centered one has its size
+            _, _, region_width, region_height = center_crop_box(*full_size, crop_ratio)
+        else:
+            region_width, region_height = full_size
+        # Destructive mode only writes the last size
+        targets = sizes if self.copy_mode else sizes[-1:]
+        factor = min(min(region_width / width, region_height / height) for width, height in targets) / DRAFT_MARGIN
+        if factor < 2:
+            return 1
+        
+        # draft() picks the largest DCT scale that keeps at least this size;
+        # img.size is the stored size, so no orientation swap is needed
+        requested = (ceil(img.width / factor), ceil(img.height / factor))
+        stored_width = img.width
+        if img.draft(img.mode, requested) is None:
+            return 1
+        return round(stored_width / img.width)
+    
+    @staticmethod
+    def _scale_region(region: Tuple[int, int, int, int], scale: int,
+                      size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        """Map a full-resolution crop region onto an image decoded at 1/scale."""
+        x, y, width, height = region
+        left, top = round(x / scale), round(y / scale)
+        right = min(size[0], max(left + 1, round((x + width) / scale)))
+        bottom = min(size[1], max(top + 1, round((y + height) / scale)))
+        return left, top, right - left, bottom - top
+    
     def move_to_trash(self, filename: str) -> bool:
         """
         Move image to trash directory.
@@ -310,33 +921,238 @@ class ImageProcessor:
         if not self.trash_dir:
             return False
         
-        image_path = self.get_image_path(filename)
-        if not image_path.exists():
-            return False
-        
-        try:
-            dest = self.trash_dir / filename
-            # Handle filename conflicts
-            if dest.exists():
-                stem = Path(filename).stem
-                ext = Path(filename).suffix
-                counter = 1
-                while dest.exists():
-                    dest = self.trash_dir / f"{stem}_{counter}{ext}"
-                    counter += 1
+        with self.locks.hold(filename):
+            image_path = self.get_image_path(filename)
+            if not image_path.exists():
+                return False
             
-            shutil.move(str(image_path), str(dest))
+            try:
+                dest = self.trash_dir / filename
+                # Handle filename conflicts
+                if dest.exists():
+                    stem = Path(filename).stem
+                    ext = Path(filename).suffix
+                    counter = 1
+                    while dest.exists():
+                        dest = self.trash_dir / f"{stem}_{counter}{ext}"
+                        counter += 1
+                
+                before = self.index.stamp()
+                shutil.move(str(image_path), str(dest))
+                self._invalidate_cached(filename)
+                self.index.discard(filename, before)
+                
+                # Also move caption file if it exists
+                caption_path = self.image_dir / f"{Path(filename).stem}.txt"
+                if caption_path.exists():
+                    caption_dest = self.trash_dir / f"{dest.stem}.txt"
+                    try:
+                        before = self.index.stamp()
+                        shutil.move(str(caption_path), str(caption_dest))
+                        self.index.touch(before)
+                    except Exception as e:
+                        print(f"Error moving caption to trash: {e}")
+
+                return True
+            except Exception as e:
+                print(f"Error moving to trash: {e}")
+                return False
+
+
+def center_crop_box(width: int, height: int, ratio: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """
+    Compute the largest centered crop with the given aspect ratio.
+    
+    Args:
+        width: Image width
+        height: Image height
+        ratio: Target (width, height) ratio
+        
+    Returns:
+        Crop region as (x, y, width, height)
+    """
+    if width * ratio[1] > height * ratio[0]:
+        crop_height = height
+        crop_width = min(width, round(height * ratio[0] / ratio[1]))
+    else:
+        crop_width = width
+        crop_height = min(height, round(width * ratio[1] / ratio[0]))
+    return (width - crop_width) // 2, (height - crop_height) // 2, crop_width, crop_height
+
+
+def auto_crop_box(img: Image.Image, ratio: Tuple[int, int], mode: str = 'center') -> Tuple[int, int, int, int]:
+    """
+    Compute the largest crop with the given aspect ratio for an image.
+    
+    In 'center' mode the crop is centered. In 'smart' mode it slides along
+    the axis being cropped to cover as much edge energy as possible, which
+    keeps the detailed subject in frame rather than flat background. The
+    energy map is computed on a copy downsampled to SALIENCY_SIZE, so this
+    costs a small fraction of the decode.
+    
+    Args:
+        img: Decoded (and oriented) PIL Image
+        ratio: Target (width, height) ratio
+        mode: 'center' or 'smart'
+        
+    Returns:
+        Crop region as (x, y, width, height)
+    """
+    x, y, crop_width, crop_height = center_crop_box(img.width, img.height, ratio)
+    if mode != 'smart' or (crop_width == img.width and crop_height == img.height):
+        return x, y, crop_width, crop_height
+    
+    factor = max(1, max(img.size) // SALIENCY_SIZE)
+    small = img if img.mode in ('L', 'RGB') else img.convert('RGB')
+    energy = small.reduce(factor).convert('L').filter(ImageFilter.FIND_EDGES).convert('F')
+    
+    # Collapse the energy map onto the axis being cropped (BOX averages
+    # each column or row), then find the best window with prefix sums
+    if crop_width < img.width:
+        collapsed = energy.resize((energy.width, 1), Image.Resampling.BOX)
+        profile = [collapsed.getpixel((i, 0)) for i in range(energy.width)]
+        length, full, crop_length = energy.width, img.width, crop_width
+    else:
+        collapsed = energy.resize((1, energy.height), Image.Resampling.BOX)
+        profile = [collapsed.getpixel((0, i)) for i in range(energy.height)]
+        length, full, crop_length = energy.height, img.height, crop_height
+    
+    window = max(1, min(length, round(crop_length * length / full)))
+    prefix = [0.0]
+    for value in profile:
+        prefix.append(prefix[-1] + value)
+    # Prefer the most central window among equally good ones
+    center = (length - window) / 2
+    best = max(range(length - window + 1),
+               key=lambda start: (prefix[start + window] - prefix[start], -abs(start - center)))
+    offset = min(full - crop_length, round(best * full / length))
+    
+    if crop_width < img.width:
+        return offset, y, crop_width, crop_height
+    return x, offset, crop_width, crop_height
+
+
+def render_output(img: Image.Image, size: Optional[Tuple[int, int]], output_path: Path,
+                  resample: str = DEFAULT_RESAMPLE, encoder: str = DEFAULT_ENCODER) -> Dict:
+    """
+    Resize an image (if a size is given) and save it.
+    
+    Defined at module level so it can run in a process pool worker.
+    
+    Args:
+        img: Decoded PIL Image
+        size: Optional target (width, height)
+        output_path: Path to save the result to
+        resample: Name of a RESAMPLE_PROFILES entry
+        encoder: Name of an ENCODER_PROFILES entry
+        
+    Returns:
+        Dict with bytes written, encode_ms and resize_ms
+    """
+    start = time.perf_counter()
+    if size is not None:
+        img = resize_image(img, size, resample)
+    resize_ms = (time.perf_counter() - start) * 1000
+    # Save using helper to handle transparency
+    result = save_image(img, output_path, encoder)
+    result['resize_ms'] = resize_ms
+    return result
+
+
+def resize_image(img: Image.Image, size: Tuple[int, int], resample: str = DEFAULT_RESAMPLE) -> Image.Image:
+    """
+    Resize an image with a RESAMPLE_PROFILES profile.
+    
+    Args:
+        img: Decoded PIL Image
+        size: Target (width, height)
+        resample: Name of a RESAMPLE_PROFILES entry
+        
+    Returns:
+        Resized image
+    """
+    method, reducing_gap = RESAMPLE_PROFILES[resample]
+    return img.resize(size, method, reducing_gap=reducing_gap)
+
+
+def save_image(img: Image.Image, output_path: Path, encoder: str = DEFAULT_ENCODER,
+               exif: Optional[bytes] = None) -> Dict:
+    """
+    Save image with proper handling of alpha channel for JPEG.
+    
+    Args:
+        img: PIL Image object
+        output_path: Path to save the image to
+        encoder: Name of an ENCODER_PROFILES entry
+        exif: Optional raw EXIF data to embed (formats that support it)
+        
+    Returns:
+        Dict with the bytes written and encode_ms, the time spent encoding
+        and writing the file
+    """
+    target_ext = output_path.suffix.lower()
+    
+    if target_ext in {'.jpg', '.jpeg'}:
+        if img.mode in ("RGBA", "P"):
+            # Convert to RGBA first to handle palette images with transparency
+            img = img.convert("RGBA")
+            # Create white background
+            new_img = Image.new("RGB", img.size, (255, 255, 255))
+            # Paste using alpha channel as mask
+            new_img.paste(img, mask=img.split()[3])
+            img = new_img
+        elif img.mode == "LA":
+            new_img = Image.new("RGB", img.size, (255, 255, 255))
+            # LA uses index 1 for alpha
+            new_img.paste(img, mask=img.split()[1])
+            img = new_img
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
             
-            # Also move caption file if it exists
-            caption_path = self.image_dir / f"{Path(filename).stem}.txt"
-            if caption_path.exists():
-                caption_dest = self.trash_dir / f"{dest.stem}.txt"
-                try:
-                    shutil.move(str(caption_path), str(caption_dest))
-                except Exception as e:
-                    print(f"Error moving caption to trash: {e}")
-
-            return True
-        except Exception as e:
-            print(f"Error moving to trash: {e}")
-            return False
+    # Atomic save: write a uniquely named temp file, then replace the target.
+    # Concurrent writers (request threads, encode pool processes, other
+    # server workers) never share a temp file.
+    fd, temp_path = _create_temp_file(output_path)
+    params = dict(ENCODER_PROFILES[encoder].get(ENCODER_FORMATS.get(target_ext), {}))
+    if exif is not None and target_ext != '.bmp':
+        params['exif'] = exif
+    try:
+        start = time.perf_counter()
+        with os.fdopen(fd, 'wb') as f:
+            img.save(f, format=Image.registered_extensions().get(target_ext), **params)
+            size = f.tell()
+        encode_ms = (time.perf_counter() - start) * 1000
+        # Keep the permissions of a file being overwritten
+        try:
+            os.chmod(temp_path, os.stat(output_path).st_mode & 0o777)
+        except FileNotFoundError:
+            pass
+        os.replace(temp_path, output_path)
+        return {'bytes': size, 'encode_ms': encode_ms}
+    except Exception as e:
+        if temp_path.exists():
+            try:
+                temp_path.unlink()
+            except Exception:
+                pass
+        raise e
+
+
+def _create_temp_file(output_path: Path) -> Tuple[int, Path]:
+    """
+    Create a new, uniquely named temp file next to output_path.
+    
+    Unlike tempfile.mkstemp (which always uses mode 0600), the file is
+    created with DEFAULT_FILE_MODE, so the kernel applies the process
+    umask exactly as for a plain open().
+    
+    Returns:
+        Tuple of (open file descriptor, temp file path)
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        temp_path = output_path.with_name(f".tmp_{output_path.stem}_{os.urandom(6).hex()}{output_path.suffix}")
+        try:
+            return os.open(temp_path, flags, DEFAULT_FILE_MODE), temp_path
+        except FileExistsError:
+            continue
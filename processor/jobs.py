@@ -0,0 +1,201 @@
+"""
+Background job queue for long-running ImageUnity operations.
+"""
+
+import queue
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+# Job states; a job ends in one of the last three
+JOB_STATES = ('queued', 'running', 'done', 'failed', 'cancelled')
+FINISHED_STATES = ('done', 'failed', 'cancelled')
+
+# Jobs run concurrently; the rest wait in the queue
+JOB_WORKERS = 2
+
+# Finished jobs kept for status queries before the oldest are dropped
+MAX_FINISHED_JOBS = 100
+
+
+class Job:
+    """
+    State and progress of one background operation.
+
+    Implements the update(done, bytes_read) / finish() interface of
+    batch.ProgressBar, so it can be passed as the progress argument of
+    run_batch, and exposes cancel_event for run_batch's cancel argument.
+    """
+
+    def __init__(self, job_id: str, kind: str, total: int, func: Callable[['Job'], Dict]):
+        self.id = job_id
+        self.kind = kind
+        self.total = total
+        self.func = func
+        self.done = 0
+        self.bytes_read = 0
+        self.state = 'queued'
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.cancel_event = threading.Event()
+        # Bumped on every change so watchers can wait for the next one
+        self.version = 0
+        self._changed = threading.Condition()
+
+    def _set(self, **fields) -> None:
+        with self._changed:
+            for key, value in fields.items():
+                setattr(self, key, value)
+            self.version += 1
+            self._changed.notify_all()
+
+    def update(self, done: int, bytes_read: int) -> None:
+        self._set(done=done, bytes_read=bytes_read)
+
+    def finish(self) -> None:
+        pass
+
+    def cancel(self) -> bool:
+        """
+        Request cancellation.
+
+        A queued job is cancelled immediately; a running job stops after
+        the items already in progress.
+
+        Returns:
+            False if the job had already finished
+        """
+        with self._changed:
+            if self.state in FINISHED_STATES:
+                return False
+            self.cancel_event.set()
+            if self.state == 'queued':
+                self.state = 'cancelled'
+                self.finished = time.time()
+            self.version += 1
+            self._changed.notify_all()
+            return True
+
+    def wait_for_change(self, version: int, timeout: float) -> int:
+        """
+        Block until the job changes past the given version, or timeout.
+
+        Returns:
+            The current version
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def to_dict(self) -> Dict:
+        """
+        Get the job state for API responses.
+
+        Returns:
+            Dict with id, kind, state, done/total counts, elapsed seconds,
+            throughput (images_per_sec, mb_per_sec), eta seconds (None until
+            known) and the result or error once finished
+        """
+        with self._changed:
+            elapsed = 0.0
+            if self.started is not None:
+                elapsed = max((self.finished or time.time()) - self.started, 1e-6)
+            rate = self.done / elapsed if elapsed else 0.0
+            eta = None
+            if self.state == 'running' and rate > 0:
+                eta = (self.total - self.done) / rate
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'state': self.state,
+                'done': self.done,
+                'total': self.total,
+                'elapsed': elapsed,
+                'images_per_sec': rate,
+                'mb_per_sec': self.bytes_read / elapsed / 1e6 if elapsed else 0.0,
+                'eta': eta,
+                'result': self.result,
+                'error': self.error
+            }
+
+
+class JobManager:
+    """
+    In-process job queue.
+
+    Submitted jobs wait in a FIFO queue and are run by a fixed number of
+    worker threads, so a burst of heavy requests cannot oversubscribe the
+    machine. Jobs are kept after finishing so clients can read the result.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        """
+        Start the worker threads.
+
+        Args:
+            workers: Number of jobs run concurrently
+        """
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._queue: 'queue.Queue[Job]' = queue.Queue()
+        for i in range(max(1, workers)):
+            threading.Thread(target=self._worker, name=f'job-worker-{i}', daemon=True).start()
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            with job._changed:
+                if job.state != 'queued':
+                    continue
+                job.state = 'running'
+                job.started = time.time()
+                job.version += 1
+                job._changed.notify_all()
+            try:
+                result = job.func(job)
+                state = 'cancelled' if job.cancel_event.is_set() else 'done'
+                job._set(result=result, state=state, finished=time.time())
+            except Exception as e:
+                print(f"Error in {job.kind} job {job.id}: {e}")
+                job._set(error=str(e), state='failed', finished=time.time())
+
+    def submit(self, kind: str, total: int, func: Callable[[Job], Dict]) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            kind: Short name of the operation, e.g. 'autocrop'
+            total: Number of items the job will process
+            func: Called with the Job; its return value becomes the result.
+                It should report progress through job.update() and stop
+                early once job.cancel_event is set.
+
+        Returns:
+            The queued Job
+        """
+        with self._lock:
+            # Random ids, so several server processes never hand out the same one
+            job = Job(uuid.uuid4().hex, kind, total, func)
+            self._jobs[job.id] = job
+            self._prune()
+        self._queue.put(job)
+        return job
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if job.state in FINISHED_STATES]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        """Return all known jobs, oldest first."""
+        with self._lock:
+            return list(self._jobs.values())
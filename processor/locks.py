@@ -0,0 +1,89 @@
+"""
+Per-file locking for ImageUnity.
+"""
+
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; locks are then in-process only
+    fcntl = None
+
+
+class FileLocks:
+    """
+    Locks keyed by filename, created on demand.
+
+    Operations on the same file are serialized while operations on
+    different files proceed in parallel. A lock is dropped again once no
+    thread holds or waits for it, so the table stays as small as the
+    number of files currently being worked on.
+
+    With a lock_dir, each lock is additionally backed by an fcntl advisory
+    lock on a file in that directory, which serializes the same file
+    across processes: several server workers, or the batch command
+    running next to the server. Lock files are kept outside the image
+    directory and named by a hash of the filename. They are left in place
+    afterwards, since deleting a lock file another process may be about
+    to lock is itself racy.
+    """
+
+    def __init__(self, lock_dir: Optional[str] = None):
+        """
+        Initialize the lock table.
+
+        Args:
+            lock_dir: Optional directory for cross-process lock files;
+                ignored where fcntl is unavailable
+        """
+        self._lock = threading.Lock()
+        # filename -> [lock, number of threads holding or waiting for it]
+        self._locks: Dict[str, List] = {}
+        self.lock_dir = lock_dir if fcntl is not None else None
+        if self.lock_dir is not None:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    @contextmanager
+    def hold(self, filename: str) -> Iterator[None]:
+        """
+        Hold the lock for a file for the duration of a with block.
+
+        Args:
+            filename: The image filename
+        """
+        with self._lock:
+            entry = self._locks.setdefault(filename, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                if self.lock_dir is None:
+                    yield
+                else:
+                    # Only one thread per process gets here, so the flock
+                    # below is only contended by other processes
+                    with self._hold_process_lock(filename):
+                        yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[filename]
+
+    @contextmanager
+    def _hold_process_lock(self, filename: str) -> Iterator[None]:
+        digest = hashlib.sha1(filename.encode('utf-8')).hexdigest()
+        fd = os.open(os.path.join(self.lock_dir, f'{digest}.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._locks)
@@ -0,0 +1,210 @@
+"""
+Lossless JPEG operations for ImageUnity, using jpegtran.
+"""
+
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from PIL import Image
+
+from .orientation import EXIF_ORIENTATION_TAG
+
+# Seconds a single jpegtran run may take before it is abandoned
+JPEGTRAN_TIMEOUT = 60
+
+# jpegtran arguments that turn stored pixels into the displayed image, for
+# each EXIF orientation (mirrors ORIENTATION_TRANSPOSES)
+JPEGTRAN_ORIENTATIONS = {
+    2: ['-flip', 'horizontal'],
+    3: ['-rotate', '180'],
+    4: ['-flip', 'vertical'],
+    5: ['-transpose'],
+    6: ['-rotate', '90'],
+    7: ['-transverse'],
+    8: ['-rotate', '270'],
+}
+
+
+def find_jpegtran() -> Optional[str]:
+    """Return the path of the jpegtran executable, or None if not installed."""
+    return shutil.which('jpegtran')
+
+
+def jpeg_block_size(img: Image.Image) -> Tuple[int, int]:
+    """
+    Return the (width, height) of a JPEG's MCU, the unit lossless crops align to.
+
+    Args:
+        img: Opened JPEG image (only the header is used)
+
+    Returns:
+        (8, 8) for grayscale or unsubsampled images, (16, 16) for 4:2:0, etc.
+    """
+    layers = getattr(img, 'layer', None) or []
+    if len(layers) <= 1:
+        # A single-component scan is coded in plain 8x8 blocks
+        return 8, 8
+    return 8 * max(layer[1] for layer in layers), 8 * max(layer[2] for layer in layers)
+
+
+def snap_crop(crop: Tuple[int, int, int, int], block: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """
+    Move a crop's top-left corner up and left onto the block grid.
+
+    The bottom-right corner stays where it is, so the snapped region still
+    contains the requested one and grows by less than a block per axis.
+
+    Args:
+        crop: (x, y, width, height) region
+        block: (width, height) of the block grid
+
+    Returns:
+        Aligned (x, y, width, height) region
+    """
+    x, y, width, height = crop
+    left = x - x % block[0]
+    top = y - y % block[1]
+    return left, top, width + x - left, height + y - top
+
+
+def crop_jpeg(source_path: Path, output_path: Path, crop: Tuple[int, int, int, int],
+              jpegtran: Optional[str] = None) -> None:
+    """
+    Crop a JPEG without decoding or re-encoding it.
+
+    The region must already be aligned with snap_crop; jpegtran is run
+    with -perfect so it refuses rather than silently re-encoding edge
+    blocks. Metadata is copied unchanged. The output is written to a temp
+    file and moved into place, like ImageProcessor outputs.
+
+    Args:
+        source_path: JPEG to crop
+        output_path: Where to write the result (may equal source_path)
+        crop: Aligned (x, y, width, height) region
+        jpegtran: Path of the jpegtran executable (default: looked up on PATH)
+
+    Raises:
+        RuntimeError: If jpegtran is not installed or fails
+    """
+    x, y, width, height = crop
+    _run_jpegtran(source_path, output_path, ['-crop', f'{width}x{height}+{x}+{y}'], jpegtran)
+
+
+def orient_jpeg(source_path: Path, output_path: Path, orientation: int,
+                jpegtran: Optional[str] = None) -> None:
+    """
+    Bake an EXIF orientation into a JPEG's pixels without re-encoding it.
+
+    The DCT blocks are rearranged by jpegtran and the orientation tag of
+    the copied EXIF data is then set to 1 (upright) in place. jpegtran
+    runs with -perfect, so this fails rather than dropping or re-encoding
+    partial edge blocks when the image size is not a multiple of the
+    block size. It also fails, leaving the output untouched, if the tag
+    cannot be rewritten in place (see reset_exif_orientation), since the
+    image would otherwise be rotated twice when displayed.
+
+    Args:
+        source_path: JPEG to transform
+        output_path: Where to write the result (may equal source_path)
+        orientation: The source's EXIF orientation (2-8)
+        jpegtran: Path of the jpegtran executable (default: looked up on PATH)
+
+    Raises:
+        RuntimeError: If jpegtran is not installed or fails, or the
+            orientation tag could not be reset
+        KeyError: If orientation needs no transform
+    """
+    _run_jpegtran(source_path, output_path, JPEGTRAN_ORIENTATIONS[orientation], jpegtran,
+                  fixup=reset_exif_orientation)
+
+
+def reset_exif_orientation(path: Path) -> bool:
+    """
+    Set the EXIF orientation tag of a JPEG file to 1, editing it in place.
+
+    Only the two bytes of the tag value change, so the rest of the EXIF
+    data (and the image data) stays byte-for-byte the same.
+
+    Args:
+        path: JPEG file
+
+    Returns:
+        True if a tag was found and rewritten, False if there is none
+    """
+    with open(path, 'r+b') as f:
+        if f.read(2) != b'\xff\xd8':
+            return False
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF or marker[1] == 0xDA:
+                # End of the headers (start of scan) without EXIF
+                return False
+            length, = struct.unpack('>H', f.read(2))
+            start = f.tell()
+            if marker[1] == 0xE1:
+                segment = f.read(length - 2)
+                offset = _find_orientation_value(segment)
+                if offset is not None:
+                    f.seek(start + offset)
+                    f.write(struct.pack('<H' if segment[6:8] == b'II' else '>H', 1))
+                    return True
+            f.seek(start + length - 2)
+
+
+def _find_orientation_value(segment: bytes) -> Optional[int]:
+    """Return the offset of the orientation value in an APP1 segment, if any."""
+    if segment[:6] != b'Exif\0\0' or len(segment) < 14:
+        return None
+    tiff = 6
+    endian = {b'II': '<', b'MM': '>'}.get(segment[tiff:tiff + 2])
+    if endian is None:
+        return None
+    ifd = tiff + struct.unpack_from(endian + 'I', segment, tiff + 4)[0]
+    if ifd + 2 > len(segment):
+        return None
+    count, = struct.unpack_from(endian + 'H', segment, ifd)
+    for entry in range(ifd + 2, min(ifd + 2 + 12 * count, len(segment) - 11), 12):
+        tag, kind = struct.unpack_from(endian + 'HH', segment, entry)
+        if tag == EXIF_ORIENTATION_TAG and kind == 3:  # SHORT, stored inline
+            return entry + 8
+    return None
+
+
+def _run_jpegtran(source_path: Path, output_path: Path, args: List[str], jpegtran: Optional[str],
+                  fixup: Optional[Callable[[Path], bool]] = None) -> None:
+    """
+    Run a jpegtran transform into a temp file, then move it into place.
+
+    fixup, if given, is called on the temp file; if it returns False the
+    temp file is discarded and RuntimeError is raised.
+    """
+    jpegtran = jpegtran or find_jpegtran()
+    if jpegtran is None:
+        raise RuntimeError('jpegtran is not installed')
+
+    fd, temp_name = tempfile.mkstemp(prefix=f".tmp_{output_path.stem}_", suffix=output_path.suffix,
+                                     dir=output_path.parent)
+    os.close(fd)
+    temp_path = Path(temp_name)
+    try:
+        result = subprocess.run(
+            [jpegtran, '-copy', 'all', '-perfect', *args, '-outfile', str(temp_path), str(source_path)],
+            capture_output=True, timeout=JPEGTRAN_TIMEOUT
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"jpegtran failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+        if fixup is not None and not fixup(temp_path):
+            raise RuntimeError(f"could not update {temp_path.name} after jpegtran")
+        # Keep the permissions of the file being replaced, or the source's
+        target = output_path if output_path.exists() else source_path
+        os.chmod(temp_path, os.stat(target).st_mode & 0o777)
+        os.replace(temp_path, output_path)
+    except Exception:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
@@ -0,0 +1,145 @@
+"""
+Persistent SQLite metadata store for ImageUnity.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Columns persisted for every image, in table order
+COLUMNS = ('filename', 'width', 'height', 'format', 'size', 'mtime_ns', 'orientation', 'has_caption')
+
+# Stay below SQLite's default limit on bound parameters per statement
+MAX_QUERY_PARAMS = 900
+
+
+class MetadataStore:
+    """
+    Sidecar database that persists image metadata across restarts.
+
+    Rows are validated against the file's current mtime and size on every
+    read, so a stale row is never returned; it is simply recomputed and
+    overwritten by the caller. has_caption depends on a different file and
+    is only a hint; ImageProcessor checks the caption file again.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Open (and create if needed) the metadata database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS images (
+                    filename TEXT PRIMARY KEY,
+                    width INTEGER NOT NULL,
+                    height INTEGER NOT NULL,
+                    format TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    orientation INTEGER NOT NULL,
+                    has_caption INTEGER NOT NULL
+                )
+            ''')
+
+    @staticmethod
+    def _row_to_info(row: sqlite3.Row) -> Dict:
+        info = {key: row[key] for key in COLUMNS if key != 'mtime_ns'}
+        info['has_caption'] = bool(info['has_caption'])
+        return info
+
+    @staticmethod
+    def _info_to_row(info: Dict, stat: os.stat_result) -> Tuple:
+        return (
+            info['filename'], info['width'], info['height'], info['format'],
+            stat.st_size, stat.st_mtime_ns, info.get('orientation', 1),
+            int(bool(info['has_caption']))
+        )
+
+    def get(self, filename: str, stat: os.stat_result) -> Optional[Dict]:
+        """
+        Look up stored metadata for a file.
+
+        Args:
+            filename: The image filename
+            stat: Current stat result of the image file
+
+        Returns:
+            Info dict, or None if missing or stale
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM images WHERE filename = ?', (filename,)
+            ).fetchone()
+        if row is None or (row['mtime_ns'], row['size']) != (stat.st_mtime_ns, stat.st_size):
+            return None
+        return self._row_to_info(row)
+
+    def get_many(self, filenames: List[str]) -> Dict[str, Tuple[Tuple[int, int], Dict]]:
+        """
+        Fetch stored metadata for many files.
+
+        The caller is expected to validate each row using the returned
+        (mtime_ns, size) pair.
+
+        Args:
+            filenames: Image filenames to look up
+
+        Returns:
+            Dict mapping filename to ((mtime_ns, size), info)
+        """
+        result = {}
+        with self._lock:
+            for start in range(0, len(filenames), MAX_QUERY_PARAMS):
+                chunk = filenames[start:start + MAX_QUERY_PARAMS]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT * FROM images WHERE filename IN ({placeholders})', chunk
+                ).fetchall()
+                for row in rows:
+                    result[row['filename']] = ((row['mtime_ns'], row['size']), self._row_to_info(row))
+        return result
+
+    def put(self, info: Dict, stat: os.stat_result) -> None:
+        """
+        Insert or replace the metadata for one file.
+
+        Args:
+            info: Info dict as returned by ImageProcessor.get_image_info
+            stat: Stat result the info was computed from
+        """
+        self.put_many([(info, stat)])
+
+    def put_many(self, items: Iterable[Tuple[Dict, os.stat_result]]) -> None:
+        """
+        Insert or replace the metadata for many files in one transaction.
+
+        Args:
+            items: Iterable of (info, stat) pairs
+        """
+        rows = [self._info_to_row(info, stat) for info, stat in items]
+        if not rows:
+            return
+        placeholders = ','.join('?' * len(COLUMNS))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f'INSERT OR REPLACE INTO images ({",".join(COLUMNS)}) VALUES ({placeholders})', rows
+            )
+
+    def delete(self, filename: str) -> None:
+        """Remove the stored metadata for a file, if any."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM images WHERE filename = ?', (filename,))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,55 @@
+"""
+EXIF orientation helpers for ImageUnity.
+"""
+
+from PIL import Image
+
+# EXIF orientation tag and the orientations that display rotated by 90/270 degrees
+EXIF_ORIENTATION_TAG = 274
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+# Transpose operation that turns stored pixels into the displayed image
+ORIENTATION_TRANSPOSES = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+def get_exif_orientation(img: Image.Image) -> int:
+    """
+    Read the EXIF orientation tag without decoding pixel data.
+
+    Args:
+        img: Freshly opened PIL Image
+
+    Returns:
+        Orientation value (1-8), 1 if absent or unreadable
+    """
+    try:
+        # PngImageFile.getexif() loads the whole image to look for an eXIf
+        # chunk after the pixel data; only use what the header provided.
+        exif = Image.Image.getexif(img)
+        orientation = exif.get(EXIF_ORIENTATION_TAG, 1)
+    except Exception:
+        return 1
+    return orientation if orientation in range(1, 9) else 1
+
+
+def apply_orientation(img: Image.Image, orientation: int) -> Image.Image:
+    """
+    Transpose pixels so the image appears as it should be displayed.
+
+    Args:
+        img: PIL Image with stored (unrotated) pixels
+        orientation: EXIF orientation value
+
+    Returns:
+        Transposed image, or the input image for orientation 1
+    """
+    method = ORIENTATION_TRANSPOSES.get(orientation)
+    return img.transpose(method) if method is not None else img
@@ -0,0 +1,204 @@
+"""
+On-disk thumbnail cache for ImageUnity.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Set, Tuple
+
+from PIL import Image
+
+from .orientation import TRANSPOSED_ORIENTATIONS, apply_orientation, get_exif_orientation
+
+# Thumbnail formats: name -> (Pillow format, file extension, mimetype)
+THUMBNAIL_FORMATS = {
+    'jpeg': ('JPEG', '.jpg', 'image/jpeg'),
+    'webp': ('WEBP', '.webp', 'image/webp'),
+}
+
+# Quality used for thumbnail encoding; previews don't need archival quality
+THUMBNAIL_QUALITY = 85
+
+# Default upper bound for the total size of the cache directory
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class ThumbnailCache:
+    """
+    Content-addressed cache of downscaled image previews.
+
+    Each thumbnail is stored under a hash of the source path, its mtime and
+    size, the requested bounding box and format, so a changed source never
+    maps to a stale thumbnail. When the cache grows beyond its size limit
+    the least recently used thumbnails are deleted.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_BYTES):
+        """
+        Initialize the cache, creating the directory if needed.
+
+        Args:
+            cache_dir: Directory to store thumbnails in
+            max_bytes: Total size the cache may grow to before evicting
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._by_source: Dict[str, Set[Path]] = {}
+        self._total_bytes = sum(p.stat().st_size for p in self._cached_files())
+        self.hits = 0
+        self.misses = 0
+
+    def _cached_files(self):
+        for path in self.cache_dir.glob('*/*'):
+            if path.suffix in {ext for _, ext, _ in THUMBNAIL_FORMATS.values()}:
+                yield path
+
+    def _key(self, source_path: Path, stat: os.stat_result, box: Tuple[int, int], fmt: str) -> str:
+        identity = f"{source_path}|{stat.st_mtime_ns}|{stat.st_size}|{box[0]}x{box[1]}|{fmt}"
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def get(self, source_path: Path, box: Tuple[int, int], fmt: str = 'jpeg') -> Path:
+        """
+        Return the thumbnail for an image, rendering it on a miss.
+
+        Args:
+            source_path: Path to the source image
+            box: Maximum (width, height) of the thumbnail, as displayed
+            fmt: Thumbnail format, a key of THUMBNAIL_FORMATS
+
+        Returns:
+            Path to the thumbnail file
+
+        Raises:
+            FileNotFoundError: If the source image does not exist
+            ValueError: If the format is not supported
+        """
+        if fmt not in THUMBNAIL_FORMATS:
+            raise ValueError(f"Unsupported thumbnail format: {fmt}")
+        pil_format, ext, _ = THUMBNAIL_FORMATS[fmt]
+
+        stat = os.stat(source_path)
+        key = self._key(source_path, stat, box, fmt)
+        thumb_path = self.cache_dir / key[:2] / f"{key}{ext}"
+
+        if thumb_path.exists():
+            # Bump the mtime so eviction treats it as recently used
+            try:
+                os.utime(thumb_path)
+            except OSError:
+                pass
+            with self._lock:
+                self.hits += 1
+                self._by_source.setdefault(source_path.name, set()).add(thumb_path)
+            return thumb_path
+
+        with self._lock:
+            self.misses += 1
+
+        thumb = self._render(source_path, box)
+        thumb_path.parent.mkdir(exist_ok=True)
+        # Unique per process and thread: several server workers share the cache
+        temp_path = thumb_path.parent / f".tmp_{os.getpid()}_{threading.get_ident()}_{thumb_path.name}"
+        try:
+            thumb.save(temp_path, format=pil_format, quality=THUMBNAIL_QUALITY)
+            os.replace(temp_path, thumb_path)
+        except Exception:
+            if temp_path.exists():
+                temp_path.unlink()
+            raise
+
+        with self._lock:
+            self._total_bytes += thumb_path.stat().st_size
+            self._by_source.setdefault(source_path.name, set()).add(thumb_path)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+        return thumb_path
+
+    def _render(self, source_path: Path, box: Tuple[int, int]) -> Image.Image:
+        """Decode the source at reduced size and shrink it into the box."""
+        with Image.open(source_path) as img:
+            orientation = get_exif_orientation(img)
+            # Work in stored orientation until the image is small
+            if orientation in TRANSPOSED_ORIENTATIONS:
+                box = (box[1], box[0])
+            # For JPEG this makes the decoder scale by 1/2, 1/4 or 1/8 using
+            # the DCT, so only a fraction of the pixels is ever produced.
+            img.draft('RGB', box)
+            img.thumbnail(box, Image.Resampling.LANCZOS)
+            # thumbnail() is a no-op when the draft already fits the box
+            img.load()
+            thumb = apply_orientation(img, orientation)
+            if thumb.mode in ('RGBA', 'LA', 'PA', 'P'):
+                thumb = self._flatten(thumb)
+            elif thumb.mode not in ('RGB', 'L'):
+                thumb = thumb.convert('RGB')
+            return thumb
+
+    @staticmethod
+    def _flatten(img: Image.Image) -> Image.Image:
+        """Composite an image with alpha onto a white background."""
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])
+        return background
+
+    def _evict(self) -> None:
+        """Delete least recently used thumbnails until below 90% of the limit."""
+        entries = []
+        for path in self._cached_files():
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 9 // 10
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
+
+    def invalidate(self, filename: str) -> None:
+        """
+        Delete the thumbnails rendered for a source image in this process.
+
+        Thumbnails from earlier runs are never served for a changed source
+        (the key includes its mtime and size) and age out through eviction.
+
+        Args:
+            filename: Source image filename
+        """
+        with self._lock:
+            for path in self._by_source.pop(filename, ()):
+                try:
+                    size = path.stat().st_size
+                    path.unlink()
+                    self._total_bytes -= size
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict:
+        """
+        Get cache counters for monitoring.
+
+        Returns:
+            Dict with hits, misses, bytes and max_bytes
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
@@ -0,0 +1,194 @@
+"""
+Filesystem watcher that keeps the ImageUnity index live.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+# Seconds a file must be quiet before its change is applied, so a burst of
+# writes (or a download in progress) is handled once
+DEBOUNCE_SECONDS = 0.5
+
+# Seconds between directory scans when inotify is not available
+POLL_INTERVAL = 2.0
+
+# inotify event flags (from <sys/inotify.h>)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+
+# struct inotify_event header: wd, mask, cookie, len
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def _load_libc():
+    """Return libc with the inotify functions, or None if unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, 'inotify_init1') or not hasattr(libc, 'inotify_add_watch'):
+        return None
+    return libc
+
+
+class DirectoryWatcher:
+    """
+    Watches the image directory and applies external changes as they happen.
+
+    On Linux the directory is watched with inotify; elsewhere, or if
+    inotify cannot be set up, it is rescanned every poll_interval seconds.
+    Changed filenames are collected and handed to
+    ImageProcessor.apply_external_changes once they have been quiet for
+    the debounce period.
+    """
+
+    def __init__(self, processor, debounce: float = DEBOUNCE_SECONDS,
+                 poll_interval: float = POLL_INTERVAL, use_inotify: bool = True):
+        """
+        Initialize the watcher. Nothing is watched until start() is called.
+
+        Args:
+            processor: ImageProcessor whose directory and index to keep current
+            debounce: Quiet period before a changed file is processed
+            poll_interval: Seconds between scans for the polling fallback
+            use_inotify: Try inotify before falling back to polling
+        """
+        self.processor = processor
+        self.directory = str(processor.image_dir)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend: Optional[str] = None
+        self._pending: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fd: Optional[int] = None
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+
+    def start(self) -> str:
+        """
+        Start watching on a background thread.
+
+        Returns:
+            The backend in use, 'inotify' or 'polling'
+        """
+        libc = _load_libc() if self.use_inotify else None
+        if libc is not None:
+            fd = libc.inotify_init1(IN_CLOEXEC)
+            if fd >= 0 and libc.inotify_add_watch(fd, os.fsencode(self.directory), WATCH_MASK) >= 0:
+                self._fd = fd
+            elif fd >= 0:
+                os.close(fd)
+        if self._fd is not None:
+            self.backend, target = 'inotify', self._run_inotify
+        else:
+            # Take the baseline now, so changes right after start() are seen
+            self._signatures = self._scan()
+            self.backend, target = 'polling', self._run_polling
+
+        # The watcher now keeps the index current; skip mtime rescans
+        self.processor.index.watched = True
+        self._thread = threading.Thread(target=target, name='directory-watcher', daemon=True)
+        self._thread.start()
+        return self.backend
+
+    def stop(self) -> None:
+        """Stop watching and wait for the background thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self.processor.index.watched = False
+
+    def _flush(self, force: bool = False) -> None:
+        """Apply the changes to files that have been quiet long enough."""
+        now = time.monotonic()
+        ready = [name for name, seen in self._pending.items() if force or now - seen >= self.debounce]
+        for name in ready:
+            del self._pending[name]
+        if ready:
+            try:
+                self.processor.apply_external_changes(sorted(ready))
+            except Exception as e:
+                print(f"Error applying directory changes: {e}")
+
+    def _run_inotify(self) -> None:
+        buffer = b''
+        while not self._stop.is_set():
+            timeout = self.debounce if self._pending else 1.0
+            readable, _, _ = select.select([self._fd], [], [], timeout)
+            if readable:
+                buffer += os.read(self._fd, 64 * 1024)
+                buffer = self._parse_events(buffer)
+            self._flush()
+        self._flush(force=True)
+
+    def _parse_events(self, buffer: bytes) -> bytes:
+        """Queue the filenames of complete events and return any remainder."""
+        offset = 0
+        now = time.monotonic()
+        while offset + EVENT_HEADER.size <= len(buffer):
+            _, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            end = offset + EVENT_HEADER.size + length
+            if end > len(buffer):
+                break
+            name = buffer[offset + EVENT_HEADER.size:end].rstrip(b'\0')
+            offset = end
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; fall back to one full rescan
+                self.processor.index.refresh(force=True)
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                print(f"Watched directory {self.directory} was removed or moved")
+                self._stop.set()
+            elif name and not mask & IN_ISDIR:
+                self._pending[os.fsdecode(name)] = now
+        return buffer[offset:]
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Return (mtime_ns, size) for every file in the directory."""
+        signatures = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            st = entry.stat()
+                            signatures[entry.name] = (st.st_mtime_ns, st.st_size)
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Error scanning {self.directory}: {e}")
+        return signatures
+
+    def _run_polling(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            previous, current = self._signatures, self._scan()
+            changed: Set[str] = {name for name, sig in current.items() if previous.get(name) != sig}
+            changed.update(previous.keys() - current.keys())
+            self._signatures = current
+            now = time.monotonic()
+            for name in changed:
+                self._pending[name] = now
+            # A scan already spaces changes out by poll_interval
+            self._flush(force=True)
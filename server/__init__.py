@@ -3,10 +3,38 @@ ImageUnity Server Package
 """
 
 from flask import Flask
+import hashlib
 import os
+import tempfile
 
+from processor.buckets import BucketIndex
+from processor.directory_index import DirectoryIndex
+from processor.events import EventBus
+from processor.image_processor import (DEFAULT_CACHE_ENTRIES, DEFAULT_ENCODER, ImageProcessor, MetadataCache,
+                                       SUPPORTED_EXTENSIONS)
+from processor.jobs import JobManager
+from processor.locks import FileLocks
+from processor.metadata_store import MetadataStore
+from processor.thumbnails import DEFAULT_CACHE_BYTES, ThumbnailCache
+from processor.watcher import POLL_INTERVAL, DirectoryWatcher
 
-def create_app(image_dir: str, trash_dir: str = None, copy_mode: bool = False):
+
+def default_cache_dir(image_dir: str) -> str:
+    """Return a per-image-directory cache location under the system temp dir."""
+    digest = hashlib.sha1(os.path.abspath(image_dir).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), 'imageunity', digest)
+
+
+def default_lock_dir(image_dir: str) -> str:
+    """Return the lock file directory shared by every process working on image_dir."""
+    return os.path.join(default_cache_dir(image_dir), 'locks')
+
+
+def create_app(image_dir: str, trash_dir: str = None, copy_mode: bool = False,
+               index_db: str = None, thumb_cache_dir: str = None,
+               thumb_cache_size: int = DEFAULT_CACHE_BYTES, encode_workers: int = 0,
+               watch: bool = False, watch_interval: float = POLL_INTERVAL,
+               encoder: str = DEFAULT_ENCODER):
     """
     Create and configure the Flask application.
     
@@ -14,6 +42,13 @@ def create_app(image_dir: str, trash_dir: str = None, copy_mode: bool = False):
         image_dir: Path to directory containing images
         trash_dir: Optional path to trash directory
         copy_mode: If True, save copies instead of overwriting
+        index_db: Optional path to an SQLite database for persistent metadata
+        thumb_cache_dir: Directory for cached thumbnails (defaults to a temp dir)
+        thumb_cache_size: Maximum size of the thumbnail cache in bytes
+        encode_workers: Processes used to resize and encode multiple outputs (0 = threads only)
+        watch: Watch the directory for changes made by other programs
+        watch_interval: Seconds between scans when inotify is unavailable
+        encoder: Default output encoder profile (see ENCODER_PROFILES)
     
     Returns:
         Configured Flask application
@@ -29,6 +64,41 @@ def create_app(image_dir: str, trash_dir: str = None, copy_mode: bool = False):
     app.config['TRASH_DIR'] = trash_dir
     app.config['COPY_MODE'] = copy_mode
     
+    # One processor serves every request. It owns the long-lived state
+    # (directory index, caches, encode pool, per-file locks) and is safe to
+    # use from concurrent request threads.
+    events = EventBus()
+    index = DirectoryIndex(image_dir, SUPPORTED_EXTENSIONS, events=events)
+    index.refresh(force=True)
+    processor = ImageProcessor(
+        image_dir, trash_dir, copy_mode,
+        index=index,
+        # Room for every image (and some outputs), so bucketing and
+        # listings are not left re-reading headers evicted by each other
+        metadata_cache=MetadataCache(max(DEFAULT_CACHE_ENTRIES, 2 * len(index))),
+        metadata_store=MetadataStore(index_db) if index_db else None,
+        thumbnails=ThumbnailCache(
+            thumb_cache_dir or os.path.join(default_cache_dir(image_dir), 'thumbs'),
+            max_bytes=thumb_cache_size
+        ),
+        encode_pool=ImageProcessor.create_encode_pool(encode_workers) if encode_workers > 0 else None,
+        # File-backed locks also serialize edits across server workers and
+        # a concurrently running batch command
+        locks=FileLocks(default_lock_dir(image_dir)),
+        encoder=encoder
+    )
+    app.config['PROCESSOR'] = processor
+    app.config['EVENTS'] = events
+    app.config['BUCKETS'] = BucketIndex()
+    app.config['JOBS'] = JobManager()
+    
+    app.config['WATCHER'] = None
+    if watch:
+        watcher = DirectoryWatcher(processor, poll_interval=watch_interval)
+        backend = watcher.start()
+        print(f"Watching {image_dir} for changes ({backend})")
+        app.config['WATCHER'] = watcher
+    
     # Register routes
     from . import routes
     app.register_blueprint(routes.bp)
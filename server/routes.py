@@ -2,20 +2,50 @@
 Flask routes for ImageUnity API.
 """
 
-from flask import Blueprint, render_template, jsonify, request, send_file, current_app
-from processor.image_processor import ImageProcessor
+from flask import Blueprint, Response, render_template, jsonify, request, send_file, current_app
+from processor.batch import normalize_orientations, parse_ratio, run_batch
+from processor.image_processor import CROP_MODES, DEFAULT_RESAMPLE, ENCODER_PROFILES, RESAMPLE_PROFILES
+from processor.jobs import FINISHED_STATES
+from processor.thumbnails import THUMBNAIL_FORMATS
+import base64
+import binascii
+import hashlib
+import json
 import os
 
 bp = Blueprint('main', __name__)
 
+# Upper bound for a single page of /api/images
+MAX_PAGE_SIZE = 1000
+
+# Upper bound for the number of images in one /api/images/info request
+MAX_BATCH_INFO = 500
+
+# Upper bound for the number of target sizes in one /process request
+MAX_PROCESS_SIZES = 16
+
+# Allowed thumbnail edge lengths, in pixels
+MIN_THUMB_SIZE = 16
+MAX_THUMB_SIZE = 1024
+
+# Preview boxes are rounded up to this step so nearby viewport sizes share a
+# cached rendition, and capped at the maximum edge length
+PREVIEW_STEP = 256
+MAX_PREVIEW_SIZE = 4096
+
+# Images processed concurrently within one batch job
+BATCH_JOB_WORKERS = os.cpu_count() or 4
+
+# Job types accepted by POST /api/jobs
+JOB_TYPES = ('batch', 'normalize-orientation')
+
+# Seconds between keepalive comments on an idle event stream
+SSE_KEEPALIVE = 15
+
 
 def get_processor():
-    """Get an ImageProcessor instance with current app config."""
-    return ImageProcessor(
-        image_dir=current_app.config['IMAGE_DIR'],
-        trash_dir=current_app.config['TRASH_DIR'],
-        copy_mode=current_app.config['COPY_MODE']
-    )
+    """Get the app's shared ImageProcessor."""
+    return current_app.config['PROCESSOR']
 
 
 @bp.route('/')
@@ -29,12 +59,375 @@ def index():
     )
 
 
+def file_etag(path):
+    """Strong ETag derived from a file's mtime and size."""
+    stat = os.stat(path)
+    return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+
+def send_validated_file(path, etag, mimetype=None):
+    """
+    Send a file with a strong ETag that browsers must revalidate.
+    
+    A matching If-None-Match is answered with 304 Not Modified, so
+    revisiting an unchanged image costs a round trip but no transfer.
+    """
+    response = send_file(path, mimetype=mimetype, etag=etag, conditional=True)
+    response.cache_control.no_cache = True
+    return response
+
+
+def validated_json(data):
+    """JSON response with a content-hash ETag, answering If-None-Match with 304."""
+    response = jsonify(data)
+    response.set_etag(hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest())
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def encode_cursor(filename):
+    """Encode the last filename of a page as an opaque cursor."""
+    payload = json.dumps({'after': filename}).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, or return None if invalid."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        after = payload['after']
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        return None
+    return after if isinstance(after, str) else None
+
+
 @bp.route('/api/images')
 def list_images():
-    """Return list of all images in the directory."""
+    """
+    Return images in the directory.
+    
+    Without paging parameters the full list is returned. With `limit`,
+    a single page is returned, starting at `offset` or after the image
+    identified by an opaque `cursor` from a previous page. With
+    `details=1`, each entry is a metadata row instead of a filename.
+    """
+    processor = get_processor()
+    details = request.args.get('details') in ('1', 'true')
+    # Read before the listing: /api/events?since=<event_id> then replays
+    # every change the listing might not include
+    event_id = current_app.config['EVENTS'].last_id
+    
+    if not any(k in request.args for k in ('offset', 'limit', 'cursor')):
+        images = processor.list_images()
+        count = len(images)
+        if details:
+            images = processor.get_images_details(images)
+        return jsonify({'images': images, 'count': count, 'event_id': event_id})
+    
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', MAX_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'Invalid offset or limit'}), 400
+    if offset < 0 or limit < 1:
+        return jsonify({'error': 'Invalid offset or limit'}), 400
+    limit = min(limit, MAX_PAGE_SIZE)
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        after = decode_cursor(cursor)
+        if after is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        images, offset, total = processor.list_images_after(after, limit)
+    else:
+        images, total = processor.list_images_page(offset, limit)
+    
+    has_more = offset + len(images) < total
+    next_cursor = encode_cursor(images[-1]) if images and has_more else None
+    if details:
+        images = processor.get_images_details(images)
+    return jsonify({
+        'images': images,
+        'count': total,
+        'offset': offset,
+        'limit': limit,
+        'next_cursor': next_cursor,
+        'event_id': event_id
+    })
+
+
+@bp.route('/api/images/info', methods=['POST'])
+def get_images_info():
+    """
+    Get metadata for many images in one request.
+    
+    Accepts either a list of `filenames`, or an `offset`/`limit` range of
+    the sorted image listing.
+    """
+    processor = get_processor()
+    
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'Missing filenames or range'}), 400
+    
+    if 'filenames' in data:
+        filenames = data['filenames']
+        if not isinstance(filenames, list) or not all(isinstance(f, str) for f in filenames):
+            return jsonify({'error': 'Invalid filenames'}), 400
+        if len(filenames) > MAX_BATCH_INFO:
+            return jsonify({'error': f'At most {MAX_BATCH_INFO} images per request'}), 400
+        if not all(processor.is_valid_filename(f) for f in filenames):
+            return jsonify({'error': 'Invalid filename'}), 400
+    elif 'offset' in data or 'limit' in data:
+        try:
+            offset = int(data.get('offset', 0))
+            limit = int(data.get('limit', MAX_BATCH_INFO))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid offset or limit'}), 400
+        if offset < 0 or limit < 1:
+            return jsonify({'error': 'Invalid offset or limit'}), 400
+        filenames, _ = processor.list_images_page(offset, min(limit, MAX_BATCH_INFO))
+    else:
+        return jsonify({'error': 'Missing filenames or range'}), 400
+    
+    images = processor.get_images_details(filenames)
+    found = {info['filename'] for info in images}
+    return jsonify({
+        'images': images,
+        'missing': [f for f in filenames if f not in found]
+    })
+
+
+@bp.route('/api/buckets')
+def list_buckets():
+    """Return image counts per aspect-ratio bucket (with `images=1`, the filenames too)."""
     processor = get_processor()
-    images = processor.list_images()
-    return jsonify({'images': images, 'count': len(images)})
+    buckets = current_app.config['BUCKETS'].get(processor)
+    include_images = request.args.get('images') in ('1', 'true')
+    
+    result = {}
+    for key, names in buckets.items():
+        result[key] = {'count': len(names)}
+        if include_images:
+            result[key]['images'] = names
+    return jsonify({'buckets': result, 'total': sum(len(n) for n in buckets.values())})
+
+
+@bp.route('/api/buckets/<key>')
+def get_bucket(key):
+    """Return the filenames in one aspect-ratio bucket."""
+    processor = get_processor()
+    buckets = current_app.config['BUCKETS'].get(processor)
+    if key not in buckets:
+        return jsonify({'error': 'Unknown bucket'}), 404
+    return jsonify({'bucket': key, 'images': buckets[key], 'count': len(buckets[key])})
+
+
+def parse_batch_options(data):
+    """
+    Validate the crop/scale options of a batch job request body.
+    
+    Returns:
+        Tuple of (keyword arguments for run_batch, error message or None)
+    """
+    options = {}
+    for field in ('ratio', 'crop_ratio'):
+        if data.get(field) is not None:
+            try:
+                options[field] = parse_ratio(str(data[field]))
+            except ValueError:
+                return None, f'Invalid {field}'
+    mode = data.get('crop_mode', 'center')
+    if mode not in CROP_MODES:
+        return None, f'crop_mode must be one of {", ".join(CROP_MODES)}'
+    options['crop_mode'] = mode
+    if data.get('encoder') is not None:
+        if data['encoder'] not in ENCODER_PROFILES:
+            return None, f'encoder must be one of {", ".join(ENCODER_PROFILES)}'
+        options['encoder'] = data['encoder']
+    sizes, error = parse_sizes(data.get('sizes'))
+    if error:
+        return None, error
+    options['sizes'] = sizes
+    if not sizes and 'crop_ratio' not in options:
+        return None, 'Missing crop_ratio or sizes'
+    return options, None
+
+
+def submit_batch_job(kind, processor, filenames, options):
+    """Queue run_batch over filenames as a background job and return the 202 response."""
+    job = current_app.config['JOBS'].submit(
+        kind, len(filenames),
+        lambda job: run_batch(processor, filenames, workers=BATCH_JOB_WORKERS,
+                              progress=job, cancel=job.cancel_event, **options)
+    )
+    return jsonify({'success': True, 'job': job.to_dict()}), 202
+
+
+@bp.route('/api/buckets/<key>/autocrop', methods=['POST'])
+def autocrop_bucket(key):
+    """Start a background job cropping every image in a bucket to a ratio."""
+    processor = get_processor()
+    buckets = current_app.config['BUCKETS'].get(processor)
+    if key not in buckets:
+        return jsonify({'error': 'Unknown bucket'}), 404
+    
+    data = request.get_json(silent=True) or {}
+    if not data.get('ratio'):
+        return jsonify({'error': 'Missing ratio'}), 400
+    options, error = parse_batch_options({
+        'crop_ratio': data['ratio'],
+        'crop_mode': data.get('mode', 'center'),
+        'sizes': data.get('sizes')
+    })
+    if error:
+        return jsonify({'error': error}), 400
+    
+    return submit_batch_job('autocrop', processor, list(buckets[key]), options)
+
+
+@bp.route('/api/jobs', methods=['POST'])
+def create_job():
+    """
+    Queue a batch job.
+    
+    The body selects images with `bucket` or `filenames` (default: all
+    images). The default `type`, 'batch', crops/scales them and takes the
+    run_batch options `sizes`, `ratio`, `crop_ratio`, `crop_mode` and `encoder`;
+    'normalize-orientation' bakes EXIF orientation into the pixels.
+    """
+    processor = get_processor()
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'Missing job parameters'}), 400
+    job_type = data.get('type', 'batch')
+    if job_type not in JOB_TYPES:
+        return jsonify({'error': 'Unknown job type'}), 400
+    
+    if data.get('bucket') is not None:
+        buckets = current_app.config['BUCKETS'].get(processor)
+        if data['bucket'] not in buckets:
+            return jsonify({'error': 'Unknown bucket'}), 404
+        filenames = list(buckets[data['bucket']])
+    elif data.get('filenames') is not None:
+        filenames = data['filenames']
+        if not isinstance(filenames, list) or not all(
+                isinstance(name, str) and processor.is_valid_filename(name) for name in filenames):
+            return jsonify({'error': 'Invalid filenames'}), 400
+    else:
+        filenames = processor.list_images()
+    
+    if job_type == 'normalize-orientation':
+        job = current_app.config['JOBS'].submit(
+            job_type, len(filenames),
+            lambda job: normalize_orientations(processor, filenames, workers=BATCH_JOB_WORKERS,
+                                               progress=job, cancel=job.cancel_event)
+        )
+        return jsonify({'success': True, 'job': job.to_dict()}), 202
+    
+    options, error = parse_batch_options(data)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    return submit_batch_job('batch', processor, filenames, options)
+
+
+@bp.route('/api/jobs')
+def list_jobs():
+    """List queued, running and recently finished jobs."""
+    return jsonify({'jobs': [job.to_dict() for job in current_app.config['JOBS'].list()]})
+
+
+@bp.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Get the progress of a background job."""
+    job = current_app.config['JOBS'].get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.to_dict())
+
+
+@bp.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running job."""
+    job = current_app.config['JOBS'].get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if not job.cancel():
+        return jsonify({'error': 'Job already finished'}), 400
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+
+@bp.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """Stream job progress as Server-Sent Events until the job finishes."""
+    job = current_app.config['JOBS'].get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    def stream():
+        version = None
+        while True:
+            current = job.wait_for_change(version, SSE_KEEPALIVE) if version is not None else job.version
+            if current == version:
+                # Comment line keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+                continue
+            version = current
+            data = job.to_dict()
+            yield f"event: progress\ndata: {json.dumps(data)}\n\n"
+            if data['state'] in FINISHED_STATES:
+                return
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@bp.route('/api/events')
+def directory_events():
+    """
+    Stream directory changes as Server-Sent Events.
+    
+    Events are 'added', 'removed' and 'modified' (with filename, index
+    and count), 'caption-changed' (with filename) and 'reset', which
+    means the client should reload the listing. Start from the
+    `event_id` of an /api/images response with `since`; reconnecting
+    clients resume from their Last-Event-ID header.
+    """
+    bus = current_app.config['EVENTS']
+    last_id = request.headers.get('Last-Event-ID', request.args.get('since'))
+    try:
+        last_id = int(last_id) if last_id is not None else bus.last_id
+    except ValueError:
+        return jsonify({'error': 'Invalid event id'}), 400
+    
+    def stream():
+        position = last_id
+        while True:
+            events = bus.wait(position, SSE_KEEPALIVE)
+            if events is None:
+                # Fell behind the history; the client has to start over
+                position = bus.last_id
+                events = [{'id': position, 'type': 'reset'}]
+            if not events:
+                yield ': keepalive\n\n'
+                continue
+            for event in events:
+                position = event['id']
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@bp.route('/api/stats')
+def get_stats():
+    """Return cache counters for monitoring."""
+    processor = get_processor()
+    return jsonify({
+        'metadata_cache': processor.metadata_cache.stats(),
+        'thumbnails': processor.thumbnails.stats()
+    })
 
 
 @bp.route('/api/image/<filename>')
@@ -47,10 +440,68 @@ def get_image(filename):
         return jsonify({'error': 'Invalid filename'}), 400
     
     image_path = processor.get_image_path(filename)
-    if not os.path.exists(image_path):
+    try:
+        etag = file_etag(image_path)
+    except OSError:
         return jsonify({'error': 'Image not found'}), 404
     
-    return send_file(image_path)
+    return send_validated_file(image_path, etag)
+
+
+@bp.route('/api/image/<filename>/thumb')
+def get_thumbnail(filename):
+    """Serve a downscaled preview of an image."""
+    processor = get_processor()
+    
+    if not processor.is_valid_filename(filename):
+        return jsonify({'error': 'Invalid filename'}), 400
+    
+    try:
+        size = int(request.args.get('size', 256))
+    except ValueError:
+        return jsonify({'error': 'Invalid size'}), 400
+    if not MIN_THUMB_SIZE <= size <= MAX_THUMB_SIZE:
+        return jsonify({'error': f'Size must be between {MIN_THUMB_SIZE} and {MAX_THUMB_SIZE}'}), 400
+    
+    fmt = request.args.get('format', 'jpeg')
+    if fmt not in THUMBNAIL_FORMATS:
+        return jsonify({'error': 'Invalid format'}), 400
+    
+    thumb_path = processor.get_thumbnail(filename, size, fmt)
+    if thumb_path is None:
+        return jsonify({'error': 'Image not found'}), 404
+    
+    # Cache files are named after their content key, which makes a stable ETag
+    return send_validated_file(thumb_path, thumb_path.stem, mimetype=THUMBNAIL_FORMATS[fmt][2])
+
+
+@bp.route('/api/image/<filename>/preview')
+def get_preview(filename):
+    """Serve a rendition of an image sized to the viewer (`max=WxH`)."""
+    processor = get_processor()
+    
+    if not processor.is_valid_filename(filename):
+        return jsonify({'error': 'Invalid filename'}), 400
+    
+    try:
+        width, height = (int(v) for v in request.args.get('max', '1920x1080').lower().split('x'))
+    except ValueError:
+        return jsonify({'error': 'Invalid max size, expected WxH'}), 400
+    if width < 1 or height < 1:
+        return jsonify({'error': 'Invalid max size, expected WxH'}), 400
+    
+    width = min(-(-width // PREVIEW_STEP) * PREVIEW_STEP, MAX_PREVIEW_SIZE)
+    height = min(-(-height // PREVIEW_STEP) * PREVIEW_STEP, MAX_PREVIEW_SIZE)
+    
+    fmt = request.args.get('format', 'jpeg')
+    if fmt not in THUMBNAIL_FORMATS:
+        return jsonify({'error': 'Invalid format'}), 400
+    
+    preview_path = processor.get_preview(filename, width, height, fmt)
+    if preview_path is None:
+        return jsonify({'error': 'Image not found'}), 404
+    
+    return send_validated_file(preview_path, preview_path.stem, mimetype=THUMBNAIL_FORMATS[fmt][2])
 
 
 @bp.route('/api/image/<filename>/info')
@@ -65,12 +516,47 @@ def get_image_info(filename):
     if info is None:
         return jsonify({'error': 'Image not found'}), 404
     
-    return jsonify(info)
+    return validated_json(info)
+
+
+def parse_resample(data):
+    """
+    Validate the `resample` profile of a request body.
+    
+    Returns:
+        Tuple of (profile name, error message or None)
+    """
+    resample = data.get('resample') or DEFAULT_RESAMPLE
+    if resample not in RESAMPLE_PROFILES:
+        return None, f'resample must be one of {", ".join(RESAMPLE_PROFILES)}'
+    return resample, None
+
+
+def parse_encoder(data, processor):
+    """
+    Validate the `encoder` profile of a request body.
+    
+    Returns:
+        Tuple of (profile name, error message or None); the processor's
+        default profile if none is given
+    """
+    encoder = data.get('encoder') or processor.encoder
+    if encoder not in ENCODER_PROFILES:
+        return None, f'encoder must be one of {", ".join(ENCODER_PROFILES)}'
+    return encoder, None
 
 
 @bp.route('/api/image/<filename>/scale', methods=['POST'])
 def scale_image(filename):
-    """Scale image to specified dimensions."""
+    """
+    Scale image to specified dimensions.
+    
+    The optional `resample` picks a speed/quality profile: 'quality'
+    (plain LANCZOS), 'balanced' (the default) or 'fast'. The optional
+    `encoder` picks an output encoder profile (fast, balanced, small or
+    lossless; default set with --encoder). The response lists each output
+    with its size in bytes and encode/resize times in `outputs`.
+    """
     processor = get_processor()
     
     if not processor.is_valid_filename(filename):
@@ -85,17 +571,37 @@ def scale_image(filename):
         height = int(data['height'])
     except ValueError:
         return jsonify({'error': 'Invalid dimensions'}), 400
+    resample, error = parse_resample(data)
+    if error:
+        return jsonify({'error': error}), 400
+    encoder, error = parse_encoder(data, processor)
+    if error:
+        return jsonify({'error': error}), 400
     
-    result = processor.scale_image(filename, width, height)
+    stats = []
+    result = processor.scale_image(filename, width, height, resample=resample, encoder=encoder, stats=stats)
     if result is None:
         return jsonify({'error': 'Failed to scale image'}), 500
     
-    return jsonify({'success': True, 'filename': result})
+    return jsonify({'success': True, 'filename': result, 'encoder': encoder, 'outputs': stats})
+
+
+def crop_box_json(region):
+    """Format an (x, y, width, height) tuple for a response."""
+    return dict(zip(('x', 'y', 'width', 'height'), region))
 
 
 @bp.route('/api/image/<filename>/crop', methods=['POST'])
 def crop_image(filename):
-    """Crop image with specified parameters."""
+    """
+    Crop image with specified parameters.
+    
+    With `lossless: true`, JPEGs are cropped without re-encoding and the
+    region is snapped to the JPEG block grid; the response then carries
+    `lossless: true` and the `crop` actually applied. Other images (or a
+    server without jpegtran) are cropped normally, honouring `encoder` as
+    /scale does.
+    """
     processor = get_processor()
     
     if not processor.is_valid_filename(filename):
@@ -113,12 +619,94 @@ def crop_image(filename):
         height = int(data['height'])
     except ValueError:
         return jsonify({'error': 'Invalid crop parameters'}), 400
+    encoder, error = parse_encoder(data, processor)
+    if error:
+        return jsonify({'error': error}), 400
     
-    result = processor.crop_image(filename, x, y, width, height)
+    if data.get('lossless'):
+        lossless = processor.crop_image_lossless(filename, x, y, width, height)
+        if lossless is not None:
+            return jsonify({'success': True, 'filename': lossless[0], 'lossless': True,
+                            'crop': crop_box_json(lossless[1])})
+    
+    stats = []
+    result = processor.crop_image(filename, x, y, width, height, encoder=encoder, stats=stats)
     if result is None:
         return jsonify({'error': 'Failed to crop image'}), 500
     
-    return jsonify({'success': True, 'filename': result})
+    return jsonify({'success': True, 'filename': result, 'lossless': False,
+                    'encoder': encoder, 'outputs': stats})
+
+
+def parse_sizes(raw):
+    """
+    Validate a list of {width, height} objects from a request body.
+    
+    Returns:
+        Tuple of (list of (width, height), error message or None)
+    """
+    sizes = raw or []
+    if not isinstance(sizes, list) or len(sizes) > MAX_PROCESS_SIZES:
+        return None, f'Sizes must be a list of at most {MAX_PROCESS_SIZES} entries'
+    try:
+        sizes = [(int(s['width']), int(s['height'])) for s in sizes]
+    except (KeyError, TypeError, ValueError):
+        return None, 'Invalid dimensions'
+    if any(w < 1 or h < 1 for w, h in sizes):
+        return None, 'Invalid dimensions'
+    return sizes, None
+
+
+@bp.route('/api/image/<filename>/process', methods=['POST'])
+def process_image(filename):
+    """
+    Apply an optional crop and scale to several sizes in one pass.
+    
+    A crop without sizes honours `lossless` as /crop does, and `resample`
+    and `encoder` are used as in /scale.
+    """
+    processor = get_processor()
+    
+    if not processor.is_valid_filename(filename):
+        return jsonify({'error': 'Invalid filename'}), 400
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Missing crop or sizes'}), 400
+    
+    crop = None
+    if data.get('crop') is not None:
+        try:
+            crop = tuple(int(data['crop'][k]) for k in ('x', 'y', 'width', 'height'))
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': 'Invalid crop parameters'}), 400
+    
+    sizes, error = parse_sizes(data.get('sizes'))
+    if error:
+        return jsonify({'error': error}), 400
+    if crop is None and not sizes:
+        return jsonify({'error': 'Missing crop or sizes'}), 400
+    resample, error = parse_resample(data)
+    if error:
+        return jsonify({'error': error}), 400
+    encoder, error = parse_encoder(data, processor)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    if crop is not None and not sizes and data.get('lossless'):
+        lossless = processor.crop_image_lossless(filename, *crop)
+        if lossless is not None:
+            return jsonify({'success': True, 'filenames': [lossless[0]], 'filename': lossless[0],
+                            'lossless': True, 'crop': crop_box_json(lossless[1])})
+    
+    stats = []
+    result = processor.process_image(filename, crop=crop, sizes=sizes, resample=resample,
+                                     encoder=encoder, stats=stats)
+    if result is None:
+        return jsonify({'error': 'Failed to process image'}), 500
+    
+    return jsonify({'success': True, 'filenames': result, 'filename': result[-1], 'lossless': False,
+                    'encoder': encoder, 'outputs': stats})
 
 
 @bp.route('/api/image/<filename>/trash', methods=['POST'])
@@ -0,0 +1,82 @@
+"""
+Production serving modes for ImageUnity.
+"""
+
+from typing import Dict
+
+from . import create_app
+
+# Servers selectable with --server; the production ones are optional installs
+SERVERS = ('dev', 'waitress', 'gunicorn')
+
+# Defaults for the production servers
+DEFAULT_WORKERS = 1
+DEFAULT_THREADS = 8
+DEFAULT_TIMEOUT = 120
+
+
+def run_server(server: str, app_options: Dict, host: str, port: int,
+               workers: int = DEFAULT_WORKERS, threads: int = DEFAULT_THREADS,
+               timeout: int = DEFAULT_TIMEOUT) -> None:
+    """
+    Create the app and serve it until interrupted.
+
+    'dev' is Flask's built-in server (one process, a thread per request).
+    'waitress' is a single process with a fixed thread pool. 'gunicorn'
+    forks `workers` processes with `threads` threads each; every worker
+    builds its own app, sharing the SQLite metadata store and the on-disk
+    thumbnail cache, which are both safe for concurrent use by several
+    processes. Every open event stream (/api/events or a job's events)
+    occupies one request thread until the client disconnects.
+
+    Args:
+        server: One of SERVERS
+        app_options: Keyword arguments for create_app
+        host: Host to bind
+        port: Port to listen on
+        workers: Worker processes (gunicorn only)
+        threads: Request threads per process
+        timeout: Seconds before an unresponsive request/worker is dropped
+
+    Raises:
+        ValueError: If the server is unknown or does not support the options
+        ImportError: If the selected server is not installed
+    """
+    if server == 'dev':
+        create_app(**app_options).run(host=host, port=port, debug=False, threaded=True)
+    elif server == 'waitress':
+        if workers > 1:
+            raise ValueError('waitress runs a single process; use --threads, or --server gunicorn')
+        try:
+            import waitress
+        except ImportError:
+            raise ImportError('waitress is not installed (pip install waitress)')
+        waitress.serve(create_app(**app_options), host=host, port=port,
+                       threads=threads, channel_timeout=timeout)
+    elif server == 'gunicorn':
+        _run_gunicorn(app_options, host, port, workers, threads, timeout)
+    else:
+        raise ValueError(f"Unknown server: {server}")
+
+
+def _run_gunicorn(app_options: Dict, host: str, port: int, workers: int, threads: int, timeout: int) -> None:
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise ImportError('gunicorn is not installed (pip install gunicorn)')
+
+    class ImageUnityApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', timeout)
+            # Each worker creates its own app after the fork, so background
+            # threads (job queue, watcher) and pools start in the worker
+            self.cfg.set('preload_app', False)
+
+        def load(self):
+            return create_app(**app_options)
+
+    ImageUnityApplication().run()
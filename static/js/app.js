@@ -2,9 +2,43 @@
  * ImageUnity - Frontend Application
  */
 
+// Number of filenames fetched per /api/images window
+const PAGE_SIZE = 200;
+// Fetch the next window once navigation gets this close to an unloaded entry
+const PREFETCH_MARGIN = 20;
+// Number of upcoming images whose metadata is preloaded in one request
+const INFO_PRELOAD = 10;
+// Thumbnails shown on each side of the current image in the strip
+const STRIP_RADIUS = 4;
+// Requested thumbnail edge length (covers the strip on high-DPI screens)
+const THUMB_SIZE = 128;
+// How long an edit waits for its change event before reloading the list
+const EVENT_WAIT_MS = 3000;
+// Coalesce bursts of change events (e.g. from a batch job) into one reload
+const RELOAD_DEBOUNCE_MS = 250;
+
 // State management
 const state = {
+    // Sparse list sized to the total image count; windows are filled on demand
     images: [],
+    pendingWindows: {},
+    // Metadata by filename, filled by batch preloads
+    infoCache: new Map(),
+    // Per-file edit counters. Only edited files get a new URL; everything
+    // else is revalidated by the browser through ETags.
+    revisions: {},
+    // Aspect-ratio bucket being browsed (null = all images)
+    bucket: null,
+    // Id of the last directory change event applied to the listing
+    eventId: null,
+    // Last event id per changed filename, and callers waiting for one
+    changes: new Map(),
+    changeWaiters: new Map(),
+    reloadTimer: null,
+    bucketTimer: null,
+    // Background job being watched (one at a time)
+    jobId: null,
+    jobEvents: null,
     currentIndex: 0,
     cropMode: false,
     cropRatio: null,
@@ -19,6 +53,14 @@ const state = {
 // DOM Elements
 const elements = {
     mainImage: document.getElementById('main-image'),
+    thumbStrip: document.getElementById('thumb-strip'),
+    bucketSelect: document.getElementById('bucket-select'),
+    autocropControls: document.getElementById('autocrop-controls'),
+    autocropRatio: document.getElementById('autocrop-ratio'),
+    btnAutocrop: document.getElementById('btn-autocrop'),
+    jobStatus: document.getElementById('job-status'),
+    jobProgress: document.getElementById('job-progress'),
+    btnCancelJob: document.getElementById('btn-cancel-job'),
     imageContainer: document.getElementById('image-container'),
     imageName: document.getElementById('image-name'),
     imageCounter: document.getElementById('image-counter'),
@@ -27,6 +69,7 @@ const elements = {
     btnNext: document.getElementById('btn-next'),
     btnApplyCrop: document.getElementById('btn-apply-crop'),
     btnCancelCrop: document.getElementById('btn-cancel-crop'),
+    losslessCrop: document.getElementById('lossless-crop'),
     btnTrash: document.getElementById('btn-trash'),
     cropOverlay: document.getElementById('crop-overlay'),
     cropRegion: document.getElementById('crop-region'),
@@ -63,6 +106,8 @@ const RATIOS = {
 // Initialize application
 async function init() {
     await loadImageList();
+    loadBuckets();
+    connectEvents();
     setupEventListeners();
 
     // Initialize Lucide icons
@@ -77,40 +122,129 @@ async function init() {
     }
 }
 
-// Load list of images from API
+// Load the image list, starting with the window around the current image
 async function loadImageList() {
+    state.images = [];
+    state.pendingWindows = {};
+    state.infoCache.clear();
+    if (state.bucket) {
+        await loadBucketImages(state.bucket);
+    } else {
+        await loadImageWindow(state.currentIndex);
+    }
+}
+
+// Load the complete filename list of one aspect-ratio bucket
+async function loadBucketImages(key) {
     try {
-        const response = await fetch('/api/images');
+        const response = await fetch(`/api/buckets/${encodeURIComponent(key)}`);
         const data = await response.json();
         state.images = data.images || [];
     } catch (error) {
-        showToast('Failed to load images', 'error');
-        console.error('Failed to load images:', error);
+        showToast('Failed to load bucket', 'error');
+        console.error('Failed to load bucket:', error);
+    }
+}
+
+// Fill the bucket selector with the server-side bucket counts
+async function loadBuckets() {
+    try {
+        const response = await fetch('/api/buckets');
+        const data = await response.json();
+        const selected = elements.bucketSelect.value;
+        elements.bucketSelect.innerHTML = '';
+        elements.bucketSelect.add(new Option(`All images (${data.total})`, ''));
+        Object.entries(data.buckets).forEach(([key, bucket]) => {
+            elements.bucketSelect.add(new Option(`${key} (${bucket.count})`, key));
+        });
+        elements.bucketSelect.value = selected;
+    } catch (error) {
+        console.error('Failed to load buckets:', error);
+    }
+}
+
+// Switch between browsing all images and a single bucket
+async function selectBucket(key) {
+    state.bucket = key || null;
+    state.currentIndex = 0;
+    elements.autocropControls.classList.toggle('hidden', !state.bucket);
+    await loadImageList();
+    if (state.images.length > 0) {
+        elements.imageContainer.classList.remove('hidden');
+        elements.emptyState.classList.add('hidden');
+        displayImage(0);
+    } else {
+        showEmptyState();
     }
 }
 
+// Fetch the window of filenames containing the given index
+function loadImageWindow(index) {
+    const offset = Math.floor(Math.max(0, index) / PAGE_SIZE) * PAGE_SIZE;
+    if (state.pendingWindows[offset]) return state.pendingWindows[offset];
+
+    const images = state.images;
+    const request = (async () => {
+        try {
+            const response = await fetch(`/api/images?offset=${offset}&limit=${PAGE_SIZE}`);
+            const data = await response.json();
+            if (state.eventId === null) state.eventId = data.event_id;
+            images.length = data.count || 0;
+            (data.images || []).forEach((name, i) => {
+                images[data.offset + i] = name;
+            });
+        } catch (error) {
+            showToast('Failed to load images', 'error');
+            console.error('Failed to load images:', error);
+        } finally {
+            delete state.pendingWindows[offset];
+        }
+    })();
+    state.pendingWindows[offset] = request;
+    return request;
+}
+
+// Make sure the filename at index is known, prefetching nearby windows
+async function ensureImageLoaded(index) {
+    if (state.images[index] === undefined) {
+        await loadImageWindow(index);
+    }
+    for (const neighbour of [index - PREFETCH_MARGIN, index + PREFETCH_MARGIN]) {
+        if (neighbour >= 0 && neighbour < state.images.length && state.images[neighbour] === undefined) {
+            loadImageWindow(neighbour);
+        }
+    }
+    return state.images[index];
+}
+
 // Display image at given index
 async function displayImage(index) {
     if (index < 0 || index >= state.images.length) return;
 
     state.currentIndex = index;
-    const filename = state.images[index];
+    const filename = await ensureImageLoaded(index);
+    if (filename === undefined || state.currentIndex !== index) return;
 
-    // Update image source with cache-busting
-    elements.mainImage.src = `/api/image/${encodeURIComponent(filename)}?t=${Date.now()}`;
+    // Load a rendition sized to the viewport; crop coordinates are still
+    // mapped to original pixels through state.imageInfo
+    // (the height cap mirrors the max-height of #main-image in style.css)
+    const containerRect = elements.imageContainer.getBoundingClientRect();
+    const dpr = window.devicePixelRatio || 1;
+    const maxWidth = Math.max(1, Math.ceil(containerRect.width * dpr));
+    const maxHeight = Math.max(1, Math.ceil((window.innerHeight - 250) * dpr));
+    elements.mainImage.src = imageUrl(filename, '/preview', { max: `${maxWidth}x${maxHeight}` });
 
     // Update UI
     elements.imageName.textContent = filename;
-    elements.imageCounter.textContent = `(${index + 1}/${state.images.length})`;
-
-    // Update navigation buttons
-    elements.btnPrev.disabled = index === 0;
-    elements.btnNext.disabled = index === state.images.length - 1;
+    updatePosition();
 
     // Fetch and display image info
     try {
-        const response = await fetch(`/api/image/${encodeURIComponent(filename)}/info?t=${Date.now()}`);
-        const info = await response.json();
+        let info = state.infoCache.get(filename);
+        if (!info) {
+            const response = await fetch(imageUrl(filename, '/info'));
+            info = await response.json();
+        }
         state.imageInfo = info;
         elements.dimensions.textContent = `Dimensions: ${info.width} × ${info.height}`;
         elements.btnEditCaption.classList.toggle('has-caption', info.has_caption === true);
@@ -118,6 +252,7 @@ async function displayImage(index) {
         elements.dimensions.textContent = 'Dimensions: -- × --';
         elements.btnEditCaption.classList.remove('has-caption');
     }
+    preloadImageInfo(index);
 
     // Exit crop/scale modes when changing images
     exitCropMode();
@@ -137,6 +272,70 @@ async function displayImage(index) {
     }
 }
 
+// Refresh the counter, navigation buttons and strip after the list changed
+function updatePosition() {
+    const index = state.currentIndex;
+    renderThumbStrip(index);
+    elements.imageCounter.textContent = `(${index + 1}/${state.images.length})`;
+    elements.btnPrev.disabled = index === 0;
+    elements.btnNext.disabled = index === state.images.length - 1;
+}
+
+// Show cached thumbnails of the images around the current one
+function renderThumbStrip(index) {
+    elements.thumbStrip.innerHTML = '';
+    const first = Math.max(0, index - STRIP_RADIUS);
+    const last = Math.min(state.images.length - 1, index + STRIP_RADIUS);
+    for (let i = first; i <= last; i++) {
+        const name = state.images[i];
+        if (name === undefined) continue;
+
+        const thumb = document.createElement('img');
+        thumb.src = imageUrl(name, '/thumb', { size: THUMB_SIZE });
+        thumb.alt = name;
+        thumb.title = name;
+        thumb.loading = 'lazy';
+        thumb.classList.toggle('current', i === index);
+        thumb.onclick = () => displayImage(i);
+        elements.thumbStrip.appendChild(thumb);
+    }
+}
+
+// Build an image API URL, tagged with the file's edit revision if any
+function imageUrl(filename, endpoint = '', query = {}) {
+    const params = new URLSearchParams(query);
+    const revision = state.revisions[filename];
+    if (revision) params.set('rev', revision);
+    const qs = params.toString();
+    return `/api/image/${encodeURIComponent(filename)}${endpoint}${qs ? '?' + qs : ''}`;
+}
+
+function markEdited(filename) {
+    state.revisions[filename] = (state.revisions[filename] || 0) + 1;
+}
+
+// Fetch metadata for the next few images in one round trip
+async function preloadImageInfo(index) {
+    const filenames = [];
+    for (let i = index + 1; i <= index + INFO_PRELOAD && i < state.images.length; i++) {
+        const name = state.images[i];
+        if (name !== undefined && !state.infoCache.has(name)) filenames.push(name);
+    }
+    if (filenames.length === 0) return;
+
+    try {
+        const response = await fetch('/api/images/info', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filenames })
+        });
+        const result = await response.json();
+        (result.images || []).forEach(info => state.infoCache.set(info.filename, info));
+    } catch (error) {
+        console.error('Preload info error:', error);
+    }
+}
+
 function detectImageRatio(width, height) {
     const currentRatio = width / height;
     const tolerance = 0.02; // Allow small rounding differences
@@ -162,19 +361,20 @@ function navigateNext() {
     }
 }
 
-// Scale image
-async function scaleImage(width, height, targetFilename = null) {
-    const filename = targetFilename || state.images[state.currentIndex];
+// Crop and scale an image in one request; returns output filenames or null
+async function processImage(filename, crop, sizes) {
+    // Only plain crops can skip re-encoding; the server ignores it otherwise
+    const lossless = elements.losslessCrop.checked;
     try {
-        const response = await fetch(`/api/image/${encodeURIComponent(filename)}/scale`, {
+        const response = await fetch(`/api/image/${encodeURIComponent(filename)}/process`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ width, height })
+            body: JSON.stringify({ crop, sizes, lossless })
         });
         const result = await response.json();
-        return result.success ? result.filename : null;
+        return result.success ? result.filenames : null;
     } catch (error) {
-        console.error('Scale error:', error);
+        console.error('Process error:', error);
         return null;
     }
 }
@@ -183,42 +383,39 @@ async function applyUnifiedActions() {
     if (!state.cropMode && state.selectedScales.length === 0) return;
 
     showLoading(true);
-    let lastFilename = state.images[state.currentIndex];
+    const filename = state.images[state.currentIndex];
+    const crop = state.cropMode ? getCropBox() : null;
+    const sizes = state.selectedScales.map(scale => ({ width: scale.w, height: scale.h }));
 
-    // 1. Perform Crop first if active
-    if (state.cropMode) {
-        const cropResult = await executeCrop();
-        if (cropResult) {
-            lastFilename = cropResult;
-        } else {
-            showLoading(false);
-            return; // Stop if crop failed
-        }
+    const sinceId = state.eventId;
+    const outputs = await processImage(filename, crop, sizes);
+    if (!outputs) {
+        showToast(state.cropMode ? 'Failed to crop image' : 'Failed to scale image', 'error');
+        showLoading(false);
+        return;
     }
 
-    // 2. Perform Batch Scaling on the (potentially newly cropped) image
-    if (state.selectedScales.length > 0) {
-        let successCount = 0;
-        for (const scale of state.selectedScales) {
-            const result = await scaleImage(scale.w, scale.h, lastFilename);
-            if (result) {
-                lastFilename = result;
-                successCount++;
-            }
-        }
-        showToast(`Processed ${successCount} version(s)`, 'success');
-    } else if (state.cropMode) {
+    // The change events for the outputs patch the list and bump revisions
+    const newFilename = outputs[outputs.length - 1];
+    if (!await waitForChange(newFilename, sinceId)) {
+        markEdited(filename);
+        outputs.forEach(markEdited);
+        await loadImageList();
+    }
+    if (sizes.length > 0) {
+        showToast(`Processed ${sizes.length} version(s)`, 'success');
+    } else {
         showToast('Cropped successfully', 'success');
     }
 
     exitCropMode();
     clearScaleSelection();
-    await refreshCurrentImage(lastFilename);
+    refreshCurrentImage(newFilename);
     showLoading(false);
 }
 
-async function executeCrop() {
-    const filename = state.images[state.currentIndex];
+// Map the on-screen crop region to original image pixels
+function getCropBox() {
     const imgRect = elements.mainImage.getBoundingClientRect();
     const containerRect = elements.imageContainer.getBoundingClientRect();
     const offsetX = imgRect.left - containerRect.left;
@@ -226,25 +423,12 @@ async function executeCrop() {
     const scaleX = state.imageInfo.width / imgRect.width;
     const scaleY = state.imageInfo.height / imgRect.height;
 
-    const body = {
+    return {
         x: Math.round((state.cropRegion.x - offsetX) * scaleX),
         y: Math.round((state.cropRegion.y - offsetY) * scaleY),
         width: Math.round(state.cropRegion.width * scaleX),
         height: Math.round(state.cropRegion.height * scaleY)
     };
-
-    try {
-        const response = await fetch(`/api/image/${encodeURIComponent(filename)}/crop`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(body)
-        });
-        const result = await response.json();
-        return result.success ? result.filename : null;
-    } catch (error) {
-        console.error('Crop error:', error);
-        return null;
-    }
 }
 
 function toggleScale(w, h, btn) {
@@ -310,6 +494,8 @@ async function saveCaption() {
         if (result.success) {
             showToast('Caption saved', 'success');
             elements.btnEditCaption.classList.add('has-caption');
+            const cached = state.infoCache.get(filename);
+            if (cached) cached.has_caption = true;
             closeCaptionEditor();
         } else {
             showToast(result.error || 'Failed to save', 'error');
@@ -470,8 +656,10 @@ async function trashImage() {
         if (result.success) {
             showToast('Moved to trash', 'success');
 
-            // Remove from list
-            state.images.splice(state.currentIndex, 1);
+            // Remove from list, unless its change event got here first
+            const index = state.images.indexOf(filename);
+            if (index !== -1) state.images.splice(index, 1);
+            state.infoCache.delete(filename);
 
             if (state.images.length === 0) {
                 showEmptyState();
@@ -491,10 +679,105 @@ async function trashImage() {
     }
 }
 
+// Queue a background job cropping the selected bucket to a ratio
+async function startAutoCrop() {
+    if (!state.bucket || state.jobId) return;
+    const ratio = elements.autocropRatio.value;
+
+    const confirmed = await showModal(
+        'Auto-crop Bucket',
+        `Crop all ${state.images.length} images in ${state.bucket} to ${ratio}, keeping the most detailed region?`
+    );
+    if (!confirmed) return;
+
+    try {
+        const response = await fetch(`/api/buckets/${encodeURIComponent(state.bucket)}/autocrop`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ ratio, mode: 'smart' })
+        });
+        const result = await response.json();
+        if (result.success) {
+            watchJob(result.job);
+        } else {
+            showToast(result.error || 'Failed to start job', 'error');
+        }
+    } catch (error) {
+        showToast('Failed to start job', 'error');
+        console.error('Job error:', error);
+    }
+}
+
+// Follow a job's progress over its event stream
+function watchJob(job) {
+    state.jobId = job.id;
+    renderJobStatus(job);
+    elements.jobStatus.classList.remove('hidden');
+
+    const events = new EventSource(`/api/jobs/${job.id}/events`);
+    state.jobEvents = events;
+    events.addEventListener('progress', (event) => {
+        const update = JSON.parse(event.data);
+        renderJobStatus(update);
+        if (['done', 'failed', 'cancelled'].includes(update.state)) {
+            finishJob(update);
+        }
+    });
+    events.onerror = () => {
+        // The stream closes after the final event; anything else is a lost connection
+        if (state.jobEvents === events) {
+            finishJob({ state: 'failed', error: 'Lost connection to job' });
+        }
+    };
+}
+
+function renderJobStatus(job) {
+    let text = `${job.kind || 'job'} ${job.done || 0}/${job.total || 0}`;
+    if (job.state === 'queued') {
+        text += ' · queued';
+    } else if (job.images_per_sec) {
+        text += ` · ${job.images_per_sec.toFixed(1)} img/s`;
+    }
+    if (job.eta !== null && job.eta !== undefined) {
+        text += ` · ETA ${formatDuration(job.eta)}`;
+    }
+    elements.jobProgress.textContent = text;
+}
+
+function formatDuration(seconds) {
+    const s = Math.round(seconds);
+    return s >= 60 ? `${Math.floor(s / 60)}m${String(s % 60).padStart(2, '0')}s` : `${s}s`;
+}
+
+function finishJob(job) {
+    state.jobEvents.close();
+    state.jobEvents = null;
+    state.jobId = null;
+    elements.jobStatus.classList.add('hidden');
+
+    if (job.state === 'done') {
+        const result = job.result || {};
+        showToast(`Processed ${result.processed || 0} images (${result.failed || 0} failed)`,
+            result.failed ? 'error' : 'success');
+    } else if (job.state === 'cancelled') {
+        showToast('Job cancelled', 'info');
+    } else {
+        showToast(job.error || 'Job failed', 'error');
+    }
+    refreshCurrentImage();
+}
+
+async function cancelJob() {
+    if (!state.jobId) return;
+    try {
+        await fetch(`/api/jobs/${state.jobId}/cancel`, { method: 'POST' });
+    } catch (error) {
+        console.error('Cancel error:', error);
+    }
+}
+
 // Refresh current image after edit
 async function refreshCurrentImage(newFilename = null) {
-    await loadImageList();
-
     if (newFilename) {
         const index = state.images.indexOf(newFilename);
         if (index !== -1) {
@@ -507,6 +790,135 @@ async function refreshCurrentImage(newFilename = null) {
     }
 }
 
+// Directory change events: patch the listing in place instead of reloading it
+function connectEvents() {
+    const events = new EventSource(`/api/events?since=${state.eventId || 0}`);
+    const handlers = {
+        'added': onImageAdded,
+        'removed': onImageRemoved,
+        'modified': onImageModified,
+        'caption-changed': onCaptionChanged,
+        'reset': () => scheduleListReload()
+    };
+    Object.entries(handlers).forEach(([type, handler]) => {
+        events.addEventListener(type, (event) => {
+            const data = JSON.parse(event.data);
+            state.eventId = data.id;
+            handler(data);
+            if (data.filename) noteChange(data.filename, data.id);
+            if (type !== 'modified' && type !== 'caption-changed') scheduleBucketRefresh();
+        });
+    });
+}
+
+function onImageAdded({ filename, index, count }) {
+    const images = state.images;
+    if (state.bucket) {
+        scheduleListReload();
+        return;
+    }
+    if (images[index] === filename) return;  // Already listed
+    if (images.length + 1 !== count) {
+        scheduleListReload();
+        return;
+    }
+
+    images.splice(index, 0, filename);
+    if (images.length === 1) {
+        elements.imageContainer.classList.remove('hidden');
+        elements.emptyState.classList.add('hidden');
+        displayImage(0);
+        return;
+    }
+    if (index <= state.currentIndex) state.currentIndex++;
+    updatePosition();
+}
+
+function onImageRemoved({ filename, index, count }) {
+    const images = state.images;
+    state.infoCache.delete(filename);
+    if (state.bucket) {
+        scheduleListReload();
+        return;
+    }
+    if (images.length === count && images[index] !== filename) return;  // Already removed
+    if (images.length - 1 !== count) {
+        scheduleListReload();
+        return;
+    }
+
+    images.splice(index, 1);
+    if (images.length === 0) {
+        showEmptyState();
+    } else if (index === state.currentIndex) {
+        displayImage(Math.min(index, images.length - 1));
+    } else {
+        if (index < state.currentIndex) state.currentIndex--;
+        updatePosition();
+    }
+}
+
+function onImageModified({ id, filename }) {
+    state.infoCache.delete(filename);
+    // Event ids are unique, so they double as cache-busting revisions
+    state.revisions[filename] = id;
+    if (state.images[state.currentIndex] === filename) {
+        displayImage(state.currentIndex);
+    } else {
+        updatePosition();
+    }
+}
+
+async function onCaptionChanged({ filename }) {
+    state.infoCache.delete(filename);
+    if (state.images[state.currentIndex] !== filename) return;
+    try {
+        const response = await fetch(imageUrl(filename, '/info'));
+        const info = await response.json();
+        elements.btnEditCaption.classList.toggle('has-caption', info.has_caption === true);
+    } catch (error) {
+        console.error('Failed to refresh caption state:', error);
+    }
+}
+
+// Record a change event for a file and wake up anyone waiting for it
+function noteChange(filename, id) {
+    state.changes.set(filename, id);
+    (state.changeWaiters.get(filename) || []).forEach(resolve => resolve(true));
+    state.changeWaiters.delete(filename);
+}
+
+// Resolve true once a change event newer than sinceId arrived for filename
+function waitForChange(filename, sinceId) {
+    if ((state.changes.get(filename) || 0) > sinceId) return Promise.resolve(true);
+    return new Promise(resolve => {
+        const waiters = state.changeWaiters.get(filename) || [];
+        waiters.push(resolve);
+        state.changeWaiters.set(filename, waiters);
+        setTimeout(() => resolve(false), EVENT_WAIT_MS);
+    });
+}
+
+// Reload the listing once a burst of events has passed
+function scheduleListReload() {
+    clearTimeout(state.reloadTimer);
+    state.reloadTimer = setTimeout(async () => {
+        await loadImageList();
+        if (state.images.length === 0) {
+            showEmptyState();
+            return;
+        }
+        elements.imageContainer.classList.remove('hidden');
+        elements.emptyState.classList.add('hidden');
+        displayImage(Math.min(state.currentIndex, state.images.length - 1));
+    }, RELOAD_DEBOUNCE_MS);
+}
+
+function scheduleBucketRefresh() {
+    clearTimeout(state.bucketTimer);
+    state.bucketTimer = setTimeout(loadBuckets, RELOAD_DEBOUNCE_MS);
+}
+
 // UI Helpers
 function showEmptyState() {
     elements.imageContainer.classList.add('hidden');
@@ -559,6 +971,9 @@ function setupEventListeners() {
     // Navigation
     elements.btnPrev.addEventListener('click', navigatePrev);
     elements.btnNext.addEventListener('click', navigateNext);
+    elements.bucketSelect.addEventListener('change', () => selectBucket(elements.bucketSelect.value));
+    elements.btnAutocrop.addEventListener('click', startAutoCrop);
+    elements.btnCancelJob.addEventListener('click', cancelJob);
 
     // Captioning
     elements.btnEditCaption.addEventListener('click', openCaptionEditor);
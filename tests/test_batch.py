@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+import pytest
+from PIL import Image
+from processor import batch
+from processor.batch import normalize_orientations, parse_ratio, parse_size, run_batch
+from processor.image_processor import ImageProcessor, center_crop_box
+
+@pytest.fixture
+def img_dir(tmp_path):
+    img_dir = tmp_path / "images"
+    img_dir.mkdir()
+    Image.new('RGB', (100, 100)).save(img_dir / "square.jpg")
+    Image.new('RGB', (160, 90)).save(img_dir / "wide.png")
+    return img_dir
+
+def test_parsers():
+    assert parse_size("512") == (512, 512)
+    assert parse_size("768x512") == (768, 512)
+    assert parse_ratio("16:9") == (16, 9)
+    with pytest.raises(ValueError):
+        parse_size("big")
+    with pytest.raises(ValueError):
+        parse_ratio("0:1")
+
+def test_center_crop_box():
+    assert center_crop_box(160, 90, (1, 1)) == (35, 0, 90, 90)
+    assert center_crop_box(100, 200, (1, 1)) == (0, 50, 100, 100)
+
+def test_run_batch_filters_by_ratio(img_dir):
+    processor = ImageProcessor(str(img_dir), copy_mode=True)
+    summary = run_batch(processor, processor.list_images(), sizes=[(32, 32), (16, 16)],
+                        ratio=(1, 1), workers=2)
+    assert summary["processed"] == 1
+    assert summary["skipped"] == 1
+    assert summary["failed"] == 0
+    assert os.path.exists(img_dir / "square_32x32.jpg")
+    assert os.path.exists(img_dir / "square_16x16.jpg")
+    assert not os.path.exists(img_dir / "wide_32x32.png")
+
+def test_run_batch_center_crop(img_dir):
+    processor = ImageProcessor(str(img_dir), copy_mode=False)
+    summary = run_batch(processor, ["wide.png"], crop_ratio=(1, 1))
+    assert summary["processed"] == 1
+    with Image.open(img_dir / "wide.png") as img:
+        assert img.size == (90, 90)
+
+def test_run_batch_cancelled(img_dir):
+    processor = ImageProcessor(str(img_dir), copy_mode=True)
+    cancel = threading.Event()
+    cancel.set()
+    summary = run_batch(processor, processor.list_images(), sizes=[(16, 16)], workers=1, cancel=cancel)
+    assert summary["processed"] == 0
+    assert summary["cancelled"] == 2
+
+def test_run_pool_bounds_pending_images(monkeypatch):
+    pending, peak = set(), []
+    real_submit = batch.ThreadPoolExecutor.submit
+
+    def submit(pool, fn, *args):
+        future = real_submit(pool, fn, *args)
+        pending.add(future)
+        future.add_done_callback(pending.discard)
+        peak.append(len(pending))
+        return future
+
+    monkeypatch.setattr(batch.ThreadPoolExecutor, "submit", submit)
+    summary = batch._run_pool(lambda name: time.sleep(0.001) or ('processed', 1, 0), [str(i) for i in range(100)],
+                              {'processed': 0}, ['processed'], workers=3, progress=None)
+    assert summary["processed"] == 100
+    assert summary["bytes_read"] == 100
+    assert max(peak) <= batch.PENDING_PER_WORKER * 3
+
+def test_normalize_orientations(img_dir):
+    exif = Image.Exif()
+    exif[274] = 8
+    Image.new('RGB', (60, 40)).save(img_dir / "rotated.png", exif=exif.tobytes())
+    processor = ImageProcessor(str(img_dir))
+    summary = normalize_orientations(processor, processor.list_images(), workers=2)
+    assert summary["reencoded"] == 1
+    assert summary["upright"] == 2
+    assert summary["failed"] == 0
+    with Image.open(img_dir / "rotated.png") as img:
+        assert img.size == (40, 60)
@@ -0,0 +1,50 @@
+from PIL import Image
+from processor import buckets
+from processor.buckets import BucketIndex, UNMATCHED_BUCKET, classify_ratios
+from processor.image_processor import ImageProcessor
+
+def test_classify_ratios():
+    result = classify_ratios([512, 768, 1024, 1000, 576], [512, 512, 576, 300, 1024])
+    assert result == ['1:1', '3:2', '16:9', UNMATCHED_BUCKET, '9:16']
+
+def test_classify_ratios_without_numpy(monkeypatch):
+    monkeypatch.setattr(buckets, 'np', None)
+    result = classify_ratios([512, 768, 1000], [512, 512, 300])
+    assert result == ['1:1', '3:2', UNMATCHED_BUCKET]
+
+def test_bucket_index_tracks_changes(tmp_path):
+    Image.new('RGB', (100, 100)).save(tmp_path / "a.jpg")
+    Image.new('RGB', (200, 300)).save(tmp_path / "b.jpg")
+    processor = ImageProcessor(str(tmp_path), copy_mode=False)
+    index = BucketIndex()
+    result = index.get(processor)
+    assert result['1:1'] == ['a.jpg']
+    assert result['2:3'] == ['b.jpg']
+
+    processor.scale_image("b.jpg", 160, 90)
+    result = index.get(processor)
+    assert result['2:3'] == []
+    assert result['16:9'] == ['b.jpg']
+
+def test_bucket_index_reads_only_changed_files(tmp_path, monkeypatch):
+    for i in range(8):
+        Image.new('RGB', (100, 100)).save(tmp_path / f"a{i}.jpg")
+    processor = ImageProcessor(str(tmp_path), copy_mode=True)
+    index = BucketIndex()
+    assert len(index.get(processor)['1:1']) == 8
+
+    read = []
+    original = ImageProcessor.get_images_details
+    monkeypatch.setattr(ImageProcessor, 'get_images_details',
+                        lambda self, names, **kw: read.extend(names) or original(self, names, **kw))
+    processor.scale_image("a0.jpg", 160, 90)
+    (tmp_path / "a1.jpg").unlink()
+    processor.index.discard("a1.jpg")
+    result = index.get(processor)
+    assert sorted(read) == ["a0_160x90.jpg", "a1.jpg"]
+    assert result['16:9'] == ["a0_160x90.jpg"]
+    assert result['1:1'] == ["a0.jpg"] + [f"a{i}.jpg" for i in range(2, 8)]
+
+    read.clear()
+    assert index.get(processor) is result
+    assert read == []
@@ -0,0 +1,108 @@
+import os
+import pytest
+from PIL import Image
+from processor.directory_index import DirectoryIndex
+from processor.events import EventBus
+from processor.image_processor import ImageProcessor, SUPPORTED_EXTENSIONS
+
+@pytest.fixture
+def img_dir(tmp_path):
+    img_dir = tmp_path / "images"
+    img_dir.mkdir()
+    for name in ["b.jpg", "a.png"]:
+        Image.new('RGB', (10, 10)).save(img_dir / name)
+    (img_dir / "a.txt").write_text("caption")
+    return img_dir
+
+def test_index_lists_sorted_images(img_dir):
+    index = DirectoryIndex(str(img_dir), SUPPORTED_EXTENSIONS)
+    assert index.names() == ["a.png", "b.jpg"]
+    assert len(index) == 2
+    assert "b.jpg" in index
+    assert "a.txt" not in index
+
+def test_index_skips_rescan_when_unchanged(img_dir):
+    index = DirectoryIndex(str(img_dir), SUPPORTED_EXTENSIONS)
+    assert index.refresh() is True
+    assert index.refresh() is False
+
+def test_index_picks_up_external_changes(img_dir):
+    index = DirectoryIndex(str(img_dir), SUPPORTED_EXTENSIONS)
+    index.names()
+    Image.new('RGB', (10, 10)).save(img_dir / "c.webp")
+    os.remove(img_dir / "a.png")
+    # Make sure the directory mtime differs even on coarse-grained filesystems
+    st = os.stat(img_dir)
+    os.utime(img_dir, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert index.names() == ["b.jpg", "c.webp"]
+
+def test_external_change_survives_own_edits(img_dir):
+    processor = ImageProcessor(str(img_dir), copy_mode=True)
+    processor.list_images()
+    Image.new('RGB', (10, 10)).save(img_dir / "ext.png")
+    st = os.stat(img_dir)
+    os.utime(img_dir, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    # Our own edits must not re-stamp over the unseen external change
+    processor.save_caption("b.jpg", "text")
+    processor.scale_image("b.jpg", 5, 5)
+    assert processor.list_images() == ["a.png", "b.jpg", "b_5x5.jpg", "ext.png"]
+
+def test_processor_updates_index_incrementally(img_dir):
+    processor = ImageProcessor(str(img_dir), copy_mode=True)
+    processor.list_images()
+    new_filename = processor.scale_image("b.jpg", 5, 5)
+    assert new_filename == "b_5x5.jpg"
+    # Our own write re-stamps the index, so no rescan is needed
+    assert processor.index.refresh() is False
+    assert processor.list_images() == ["a.png", "b.jpg", "b_5x5.jpg"]
+
+def test_index_publishes_changes(img_dir):
+    # Enough files that one external change is applied incrementally
+    for i in range(6):
+        Image.new('RGB', (10, 10)).save(img_dir / f"z{i}.jpg")
+    events = EventBus()
+    index = DirectoryIndex(str(img_dir), SUPPORTED_EXTENSIONS, events=events)
+    index.refresh(force=True)
+    start = events.last_id
+
+    processor = ImageProcessor(str(img_dir), copy_mode=True, index=index)
+    processor.scale_image("a.png", 5, 5)
+    processor.save_caption("b.jpg", "text")
+    os.remove(img_dir / "b.jpg")
+    index.discard("b.jpg")
+    Image.new('RGB', (10, 10)).save(img_dir / "c.jpg")
+    index.refresh(force=True)
+
+    changes = [(e['type'], e['filename'], e.get('index'), e.get('count')) for e in events.since(start)]
+    assert changes == [
+        ('added', 'a_5x5.png', 1, 9),
+        ('caption-changed', 'b.jpg', None, None),
+        ('removed', 'b.jpg', 2, 8),
+        ('added', 'c.jpg', 2, 9),
+    ]
+
+def test_event_bus_history():
+    events = EventBus(max_history=2)
+    for name in ["a", "b", "c"]:
+        events.publish('added', filename=name)
+    assert [e['filename'] for e in events.since(1)] == ["b", "c"]
+    assert events.since(3) == []
+    # Event 1 was dropped, so a reader that stopped at 0 has missed it
+    assert events.since(0) is None
+    assert events.wait(3, timeout=0.01) == []
+
+def test_index_lists_changes_since_version(img_dir, monkeypatch):
+    index = DirectoryIndex(str(img_dir), SUPPORTED_EXTENSIONS)
+    names, version = index.snapshot()
+    processor = ImageProcessor(str(img_dir), copy_mode=True, index=index)
+    processor.scale_image("a.png", 5, 5)
+    index.discard("b.jpg")
+    changed, latest = index.changes_since(version)
+    assert changed == {"a_5x5.png", "b.jpg"}
+    assert index.changes_since(latest) == (set(), latest)
+
+    # Once the log has been trimmed past a version, callers must start over
+    monkeypatch.setattr('processor.directory_index.CHANGE_LOG_SIZE', 1)
+    index.add("a.png")
+    assert index.changes_since(version) == (None, latest + 1)
+    assert index.changes_since(latest) == ({"a.png"}, latest + 1)
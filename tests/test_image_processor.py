@@ -2,8 +2,8 @@ import pytest
 import os
 import shutil
 from pathlib import Path
-from PIL import Image
-from processor.image_processor import ImageProcessor
+from PIL import Image, ImageChops, ImageOps, ImageStat
+from processor.image_processor import RESAMPLE_PROFILES, ImageProcessor, auto_crop_box, resize_image
 
 @pytest.fixture
 def test_data(tmp_path):
@@ -72,3 +72,216 @@ def test_invalid_filename(test_data):
     assert processor.is_valid_filename("test.jpg") is True
     assert processor.is_valid_filename("../test.jpg") is False
     assert processor.is_valid_filename("sub/test.jpg") is False
+
+def test_get_image_info_reads_header_only(test_data, monkeypatch):
+    # Orientation 6 means the image is displayed rotated by 90 degrees
+    img = Image.new('RGB', (120, 80), color=(0, 255, 0))
+    exif = Image.Exif()
+    exif[274] = 6
+    img.save(os.path.join(test_data["img_dir"], "rotated.jpg"), exif=exif)
+
+    def fail_load(self):
+        raise AssertionError("pixel data must not be decoded")
+    monkeypatch.setattr("PIL.ImageFile.ImageFile.load", fail_load)
+
+    processor = ImageProcessor(test_data["img_dir"])
+    info = processor.get_image_info("rotated.jpg")
+    assert info is not None
+    assert info["width"] == 80
+    assert info["height"] == 120
+    assert info["orientation"] == 6
+
+def test_get_image_info_cached(test_data):
+    processor = ImageProcessor(test_data["img_dir"], copy_mode=False)
+    assert processor.get_image_info("test.jpg")["width"] == 100
+    assert processor.get_image_info("test.jpg")["width"] == 100
+    stats = processor.metadata_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+    # Overwriting the image invalidates the cached entry
+    processor.scale_image("test.jpg", 40, 30)
+    info = processor.get_image_info("test.jpg")
+    assert (info["width"], info["height"]) == (40, 30)
+
+    processor.save_caption("test.jpg", "a red square")
+    assert processor.get_image_info("test.jpg")["has_caption"] is True
+
+def test_process_image_copy_mode(test_data):
+    processor = ImageProcessor(test_data["img_dir"], copy_mode=True)
+    outputs = processor.process_image("test.jpg", crop=(0, 0, 80, 40), sizes=[(40, 20), (20, 10)])
+    assert outputs == ["test_crop_2-1.jpg", "test_crop_2-1_40x20.jpg", "test_crop_2-1_20x10.jpg"]
+    for name, size in zip(outputs, [(80, 40), (40, 20), (20, 10)]):
+        with Image.open(os.path.join(test_data["img_dir"], name)) as img:
+            assert img.size == size
+    assert set(outputs) <= set(processor.list_images())
+
+def test_process_image_destructive_mode(test_data):
+    processor = ImageProcessor(test_data["img_dir"], copy_mode=False)
+    outputs = processor.process_image("test.jpg", crop=(10, 10, 50, 50), sizes=[(40, 40), (30, 30)])
+    assert outputs == ["test.jpg"]
+    with Image.open(test_data["test_image_path"]) as img:
+        assert img.size == (30, 30)
+
+def test_process_image_invalid_crop(test_data):
+    processor = ImageProcessor(test_data["img_dir"], copy_mode=True)
+    assert processor.process_image("test.jpg", crop=(60, 60, 50, 50), sizes=[(10, 10)]) is None
+
+def test_process_image_with_encode_pool(test_data):
+    pool = ImageProcessor.create_encode_pool(2)
+    try:
+        processor = ImageProcessor(test_data["img_dir"], copy_mode=True, encode_pool=pool)
+        outputs = processor.process_image("test.jpg", sizes=[(64, 64), (32, 32), (16, 16)])
+    finally:
+        pool.shutdown()
+    assert outputs == ["test_64x64.jpg", "test_32x32.jpg", "test_16x16.jpg"]
+    with Image.open(os.path.join(test_data["img_dir"], "test_16x16.jpg")) as img:
+        assert img.size == (16, 16)
+
+def test_auto_crop_box():
+    img = Image.new('L', (300, 100), color=0)
+    # Detail near the right edge; flat background elsewhere
+    for x in range(220, 290, 4):
+        img.paste(255, (x, 20, x + 2, 80))
+    assert auto_crop_box(img, (1, 1), 'center') == (100, 0, 100, 100)
+    x, y, width, height = auto_crop_box(img, (1, 1), 'smart')
+    assert (y, width, height) == (0, 100, 100)
+    assert 190 <= x <= 200
+
+def test_process_image_crop_ratio(test_data):
+    processor = ImageProcessor(test_data["img_dir"], copy_mode=True)
+    outputs = processor.process_image("test.jpg", crop_ratio=(2, 1), crop_mode='smart', sizes=[(40, 20)])
+    assert outputs == ["test_crop_2-1.jpg", "test_crop_2-1_40x20.jpg"]
+    with Image.open(os.path.join(test_data["img_dir"], outputs[0])) as img:
+        assert img.size == (100, 50)
+    assert processor.process_image("test.jpg", crop_ratio=(2, 1), crop_mode='random') is None
+
+def test_save_uses_unique_temp_files(test_data, monkeypatch):
+    temp_names = []
+    real_replace = os.replace
+
+    def record_replace(src, dst):
+        temp_names.append(os.path.basename(src))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", record_replace)
+    os.chmod(test_data["test_image_path"], 0o644)
+    processor = ImageProcessor(test_data["img_dir"], copy_mode=False)
+    processor.scale_image("test.jpg", 50, 50)
+    processor.scale_image("test.jpg", 40, 40)
+    assert len(set(temp_names)) == 2
+    assert all(name.startswith(".tmp_test_") for name in temp_names)
+    # Overwriting keeps the original permissions
+    assert os.stat(test_data["test_image_path"]).st_mode & 0o777 == 0o644
+    assert not [p for p in os.listdir(test_data["img_dir"]) if p.startswith(".tmp_")]
+
+def test_save_new_file_follows_umask(test_data):
+    processor = ImageProcessor(test_data["img_dir"], copy_mode=True)
+    old_umask = os.umask(0o027)
+    try:
+        new_filename = processor.scale_image("test.jpg", 50, 50)
+    finally:
+        os.umask(old_umask)
+    assert os.stat(os.path.join(test_data["img_dir"], new_filename)).st_mode & 0o777 == 0o640
+
+def _detailed_jpeg(path, size):
+    img = Image.radial_gradient('L').resize(size).convert('RGB')
+    for x in range(0, size[0], 64):
+        img.paste((0, 0, 255), (x, 0, x + 8, size[1]))
+    img.save(path, quality=95)
+
+def test_process_image_reduced_jpeg_decode(test_data, monkeypatch):
+    path = os.path.join(test_data["img_dir"], "big.jpg")
+    _detailed_jpeg(path, (2048, 1536))
+    # The same output from a full-size decode, encoded the same way
+    expected_path = os.path.join(test_data["trash_dir"], "expected.jpg")
+    with Image.open(path) as img:
+        img.crop((256, 0, 1792, 1536)).resize((192, 192), Image.Resampling.LANCZOS).save(expected_path, quality=95)
+
+    decoded_sizes = []
+    real_load = Image.Image.load
+    monkeypatch.setattr(Image.Image, "load", lambda self: decoded_sizes.append(self.size) or real_load(self))
+    processor = ImageProcessor(test_data["img_dir"], copy_mode=False)
+    assert processor.process_image("big.jpg", crop=(256, 0, 1536, 1536), sizes=[(192, 192)]) == ["big.jpg"]
+    # 1536 / 192 = 8, so a 1/4 decode still leaves twice the output size
+    assert (512, 384) in decoded_sizes
+
+    with Image.open(path) as img, Image.open(expected_path) as expected:
+        assert img.size == (192, 192)
+        diff = ImageStat.Stat(ImageChops.difference(img, expected).convert('L')).mean[0]
+    assert diff < 2
+
+def test_process_image_full_decode_for_copy_crop(test_data):
+    path = os.path.join(test_data["img_dir"], "big.jpg")
+    _detailed_jpeg(path, (1024, 768))
+    processor = ImageProcessor(test_data["img_dir"], copy_mode=True)
+    outputs = processor.process_image("big.jpg", crop=(0, 0, 768, 768), sizes=[(64, 64)])
+    with Image.open(os.path.join(test_data["img_dir"], outputs[0])) as img:
+        assert img.size == (768, 768)
+
+def _oriented(path, orientation, **params):
+    img = Image.new('RGB', (60, 40), color=(0, 0, 0))
+    img.paste((255, 0, 0), (0, 0, 20, 10))
+    img.paste((0, 255, 0), (50, 30, 60, 40))
+    exif = Image.Exif()
+    exif[274] = orientation
+    exif[305] = "camera"
+    img.save(path, exif=exif.tobytes(), **params)
+    return img
+
+@pytest.mark.parametrize("orientation", range(2, 9))
+def test_normalize_orientation(test_data, orientation):
+    path = os.path.join(test_data["img_dir"], "rotated.png")
+    _oriented(path, orientation)
+    with Image.open(path) as img:
+        expected = ImageOps.exif_transpose(img)
+    processor = ImageProcessor(test_data["img_dir"])
+    assert processor.get_image_info("rotated.png")["orientation"] == orientation
+
+    assert processor.normalize_orientation("rotated.png") == "reencoded"
+    assert processor.get_image_info("rotated.png")["orientation"] == 1
+    with Image.open(path) as img:
+        assert 274 not in img.getexif()
+        assert img.getexif()[305] == "camera"
+        assert ImageChops.difference(img.convert('RGB'), expected.convert('RGB')).getbbox() is None
+    assert processor.normalize_orientation("rotated.png") == "upright"
+
+def test_normalize_orientation_copy_mode_keeps_original(test_data):
+    path = os.path.join(test_data["img_dir"], "rotated.jpg")
+    _oriented(path, 6)
+    with open(path, 'rb') as f:
+        original = f.read()
+    processor = ImageProcessor(test_data["img_dir"], copy_mode=True)
+    assert processor.normalize_orientation("rotated.jpg") == "skipped"
+    assert processor.get_image_info("rotated.jpg")["orientation"] == 6
+    with open(path, 'rb') as f:
+        assert f.read() == original
+
+def test_resize_image_profiles():
+    img = Image.radial_gradient('L').resize((1024, 768))
+    reference = resize_image(img, (64, 48), 'quality')
+    for profile in RESAMPLE_PROFILES:
+        resized = resize_image(img, (64, 48), profile)
+        assert resized.size == (64, 48)
+        assert ImageStat.Stat(ImageChops.difference(resized, reference)).mean[0] < 2
+
+def test_process_image_unknown_resample(test_data):
+    processor = ImageProcessor(test_data["img_dir"], copy_mode=True)
+    assert processor.process_image("test.jpg", sizes=[(10, 10)], resample="nearest") is None
+
+def test_encoder_profiles(test_data):
+    img = Image.radial_gradient('L').convert('RGB')
+    img.save(os.path.join(test_data["img_dir"], "gradient.png"))
+    processor = ImageProcessor(test_data["img_dir"], copy_mode=True, encoder="fast")
+    sizes = {}
+    for encoder in ("fast", "small"):
+        stats = []
+        outputs = processor.process_image("gradient.png", sizes=[(200, 200)], encoder=encoder, stats=stats)
+        assert [entry["filename"] for entry in stats] == outputs
+        assert stats[0]["bytes"] == os.path.getsize(os.path.join(test_data["img_dir"], outputs[0]))
+        assert stats[0]["encode_ms"] >= 0 and stats[0]["resize_ms"] >= 0
+        sizes[encoder] = stats[0]["bytes"]
+    assert sizes["small"] < sizes["fast"]
+    assert processor.process_image("gradient.png", sizes=[(20, 20)], encoder="tiny") is None
+    with pytest.raises(ValueError):
+        ImageProcessor(test_data["img_dir"], encoder="tiny")
@@ -0,0 +1,52 @@
+import threading
+from processor.jobs import JobManager
+
+def test_job_lifecycle():
+    manager = JobManager(workers=1)
+    job = manager.submit('test', 2, lambda job: job.update(2, 10) or {'ok': True})
+    while job.state not in ('done', 'failed'):
+        job.wait_for_change(job.version, 1)
+    data = job.to_dict()
+    assert data["state"] == 'done'
+    assert data["done"] == 2
+    assert data["result"] == {'ok': True}
+    assert manager.get(job.id) is job
+
+def test_cancel_queued_and_running_jobs():
+    manager = JobManager(workers=1)
+    release = threading.Event()
+
+    def blocking(job):
+        release.wait(5)
+        return {'stopped': job.cancel_event.is_set()}
+
+    running = manager.submit('test', 1, blocking)
+    queued = manager.submit('test', 1, lambda job: {})
+    while running.state == 'queued':
+        running.wait_for_change(running.version, 1)
+
+    assert queued.cancel()
+    assert queued.state == 'cancelled'
+    assert running.cancel()
+    release.set()
+    while running.state == 'running':
+        running.wait_for_change(running.version, 1)
+    assert running.state == 'cancelled'
+    assert running.result == {'stopped': True}
+    assert not running.cancel()
+
+def test_failed_job():
+    manager = JobManager(workers=1)
+    job = manager.submit('test', 1, lambda job: 1 / 0)
+    while job.state in ('queued', 'running'):
+        job.wait_for_change(job.version, 1)
+    assert job.state == 'failed'
+    assert 'division' in job.error
+
+def test_job_ids_unique_across_managers():
+    # Each server worker process has its own manager
+    first, second = JobManager(workers=1), JobManager(workers=1)
+    a = first.submit('test', 0, lambda job: {})
+    b = second.submit('test', 0, lambda job: {})
+    assert a.id != b.id
+    assert second.get(a.id) is None
@@ -0,0 +1,61 @@
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from processor.locks import FileLocks, fcntl
+
+def test_same_file_is_serialized():
+    locks = FileLocks()
+    active = []
+    overlaps = []
+
+    def work():
+        with locks.hold("a.jpg"):
+            active.append(1)
+            if len(active) > 1:
+                overlaps.append(1)
+            time.sleep(0.01)
+            active.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert overlaps == []
+    assert len(locks) == 0
+
+def test_different_files_run_in_parallel():
+    locks = FileLocks()
+    inside = threading.Barrier(2, timeout=2)
+
+    def work(name):
+        with locks.hold(name):
+            # Both threads must be inside their locks at once to pass
+            inside.wait()
+
+    threads = [threading.Thread(target=work, args=(name,)) for name in ("a.jpg", "b.jpg")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not inside.broken
+
+@pytest.mark.skipif(fcntl is None, reason="fcntl not available")
+def test_file_backed_locks_exclude_other_processes(tmp_path):
+    locks = FileLocks(str(tmp_path))
+    with locks.hold("a.jpg"):
+        # Another process must not get the flock while it is held here
+        code = (
+            "import fcntl, os, sys\n"
+            "fd = os.open(sys.argv[1], os.O_RDWR)\n"
+            "try:\n"
+            "    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)\n"
+            "except BlockingIOError:\n"
+            "    sys.exit(3)\n"
+        )
+        [lock_file] = list(tmp_path.glob("*.lock"))
+        result = subprocess.run([sys.executable, "-c", code, str(lock_file)])
+        assert result.returncode == 3
+    assert subprocess.run([sys.executable, "-c", code, str(lock_file)]).returncode == 0
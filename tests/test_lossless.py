@@ -0,0 +1,105 @@
+import os
+import struct
+import pytest
+from PIL import Image
+from processor import image_processor
+from processor.image_processor import ImageProcessor
+from processor.lossless import find_jpegtran, jpeg_block_size, reset_exif_orientation, snap_crop
+
+@pytest.fixture
+def img_dir(tmp_path):
+    Image.new('RGB', (100, 80), color=(0, 128, 255)).save(tmp_path / "photo.jpg", quality=90)
+    Image.new('RGB', (100, 80), color=(0, 128, 255)).save(tmp_path / "full.jpg", subsampling=0)
+    Image.new('L', (100, 80)).save(tmp_path / "gray.jpg")
+    Image.new('RGB', (100, 80)).save(tmp_path / "photo.png")
+    return tmp_path
+
+def test_jpeg_block_size(img_dir):
+    sizes = {}
+    for name in ("photo.jpg", "full.jpg", "gray.jpg"):
+        with Image.open(img_dir / name) as img:
+            sizes[name] = jpeg_block_size(img)
+    assert sizes == {"photo.jpg": (16, 16), "full.jpg": (8, 8), "gray.jpg": (8, 8)}
+
+def test_snap_crop_keeps_requested_region():
+    assert snap_crop((20, 9, 50, 40), (16, 16)) == (16, 0, 54, 49)
+    assert snap_crop((32, 16, 10, 10), (16, 16)) == (32, 16, 10, 10)
+
+def test_lossless_crop_unavailable_falls_back(img_dir, monkeypatch):
+    monkeypatch.setattr(image_processor, "find_jpegtran", lambda: None)
+    processor = ImageProcessor(str(img_dir), copy_mode=True)
+    assert processor.crop_image_lossless("photo.jpg", 20, 10, 40, 40) is None
+
+def test_lossless_crop_skips_non_jpeg(img_dir):
+    processor = ImageProcessor(str(img_dir), copy_mode=True)
+    assert processor.crop_image_lossless("photo.png", 0, 0, 40, 40) is None
+
+@pytest.mark.skipif(find_jpegtran() is None, reason="jpegtran not installed")
+def test_lossless_crop(img_dir):
+    processor = ImageProcessor(str(img_dir), copy_mode=True)
+    filename, region = processor.crop_image_lossless("photo.jpg", 20, 10, 40, 40)
+    assert filename == "photo_crop_1-1.jpg"
+    assert region == (16, 0, 44, 50)
+    with Image.open(img_dir / filename) as img:
+        assert img.size == (44, 50)
+    assert processor.crop_image_lossless("photo.jpg", 90, 70, 20, 20) is None
+
+def _big_endian_exif(orientation_value):
+    """EXIF with the orientation as given (type, packed value) and a camera model."""
+    entries = [(274, orientation_value[0], 1, orientation_value[1]), (305, 2, 7, None)]
+    ifd = struct.pack(">H", len(entries))
+    strings = b"camera\0"
+    string_offset = 8 + 2 + 12 * len(entries) + 4
+    for tag, kind, count, value in entries:
+        ifd += struct.pack(">HHI", tag, kind, count) + (value or struct.pack(">I", string_offset))
+    return b"Exif\0\0MM\0*" + struct.pack(">I", 8) + ifd + b"\0\0\0\0" + strings
+
+@pytest.mark.parametrize("byte_order", ["II", "MM"])
+def test_reset_exif_orientation(tmp_path, byte_order):
+    exif = Image.Exif()
+    exif[274] = 6
+    exif[305] = "camera"
+    data = exif.tobytes()
+    if byte_order == "MM":
+        # Pillow writes little-endian; build the big-endian equivalent by hand
+        data = _big_endian_exif((3, struct.pack(">HH", 6, 0)))
+    path = tmp_path / "photo.jpg"
+    Image.new('RGB', (32, 16)).save(path, exif=data)
+    size = path.stat().st_size
+
+    assert reset_exif_orientation(path) is True
+    assert path.stat().st_size == size
+    with Image.open(path) as img:
+        assert img.getexif()[274] == 1
+        assert img.getexif()[305] == "camera"
+
+def test_reset_exif_orientation_without_exif(img_dir):
+    assert reset_exif_orientation(img_dir / "photo.jpg") is False
+
+def test_reset_exif_orientation_needs_inline_short(tmp_path):
+    path = tmp_path / "photo.jpg"
+    # Orientation stored as a LONG: readers honour it, but it is not patched
+    Image.new('RGB', (32, 16)).save(path, exif=_big_endian_exif((4, struct.pack(">I", 6))))
+    with Image.open(path) as img:
+        assert img.getexif()[274] == 6
+    assert reset_exif_orientation(path) is False
+
+@pytest.mark.skipif(find_jpegtran() is None, reason="jpegtran not installed")
+def test_normalize_orientation_falls_back_when_tag_not_patchable(img_dir):
+    path = img_dir / "rotated.jpg"
+    Image.new('RGB', (64, 48)).save(path, exif=_big_endian_exif((4, struct.pack(">I", 6))))
+    processor = ImageProcessor(str(img_dir), copy_mode=False)
+    assert processor.normalize_orientation("rotated.jpg") == "reencoded"
+    info = processor.get_image_info("rotated.jpg")
+    assert (info["width"], info["height"], info["orientation"]) == (48, 64, 1)
+    assert not [p for p in os.listdir(img_dir) if p.startswith(".tmp_")]
+
+@pytest.mark.skipif(find_jpegtran() is None, reason="jpegtran not installed")
+def test_normalize_orientation_lossless(img_dir):
+    exif = Image.Exif()
+    exif[274] = 6
+    Image.new('RGB', (64, 48)).save(img_dir / "rotated.jpg", exif=exif.tobytes())
+    processor = ImageProcessor(str(img_dir), copy_mode=False)
+    assert processor.normalize_orientation("rotated.jpg") == "lossless"
+    info = processor.get_image_info("rotated.jpg")
+    assert (info["width"], info["height"], info["orientation"]) == (48, 64, 1)
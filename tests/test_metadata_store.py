@@ -0,0 +1,58 @@
+import os
+import pytest
+from PIL import Image
+from processor.image_processor import ImageProcessor
+from processor.metadata_store import MetadataStore
+
+@pytest.fixture
+def img_dir(tmp_path):
+    img_dir = tmp_path / "images"
+    img_dir.mkdir()
+    Image.new('RGB', (64, 32)).save(img_dir / "wide.jpg")
+    Image.new('RGB', (32, 64)).save(img_dir / "tall.png")
+    (img_dir / "tall.txt").write_text("caption")
+    return img_dir
+
+def test_store_persists_across_instances(img_dir, tmp_path):
+    db_path = str(tmp_path / "meta.db")
+    processor = ImageProcessor(str(img_dir), metadata_store=MetadataStore(db_path))
+    assert processor.get_image_info("wide.jpg")["width"] == 64
+
+    # A fresh store (e.g. after restart) is served from the database
+    store = MetadataStore(db_path)
+    stat = os.stat(img_dir / "wide.jpg")
+    info = store.get("wide.jpg", stat)
+    assert info["width"] == 64
+    assert info["height"] == 32
+    assert info["format"] == "JPEG"
+    assert info["has_caption"] is False
+
+def test_store_rejects_stale_rows(img_dir, tmp_path):
+    store = MetadataStore(str(tmp_path / "meta.db"))
+    processor = ImageProcessor(str(img_dir), metadata_store=store)
+    processor.get_image_info("wide.jpg")
+
+    Image.new('RGB', (10, 10)).save(img_dir / "wide.jpg")
+    assert store.get("wide.jpg", os.stat(img_dir / "wide.jpg")) is None
+
+def test_images_details(img_dir, tmp_path):
+    store = MetadataStore(str(tmp_path / "meta.db"))
+    processor = ImageProcessor(str(img_dir), metadata_store=store)
+    details = processor.get_images_details(["tall.png", "wide.jpg", "missing.jpg"])
+    assert [d["filename"] for d in details] == ["tall.png", "wide.jpg"]
+    assert details[0]["has_caption"] is True
+    assert set(store.get_many(["tall.png", "wide.jpg"])) == {"tall.png", "wide.jpg"}
+
+def test_external_caption_seen_after_restart(img_dir, tmp_path):
+    db_path = str(tmp_path / "meta.db")
+    processor = ImageProcessor(str(img_dir), metadata_store=MetadataStore(db_path))
+    assert processor.get_image_info("wide.jpg")["has_caption"] is False
+
+    # Written by a tagger while the server is down; the image is unchanged
+    (img_dir / "wide.txt").write_text("tag")
+    processor = ImageProcessor(str(img_dir), metadata_store=MetadataStore(db_path))
+    assert processor.get_image_info("wide.jpg")["has_caption"] is True
+    assert processor.get_images_details(["wide.jpg"])[0]["has_caption"] is True
+    # The in-memory cache does not hide it either
+    (img_dir / "wide.txt").unlink()
+    assert processor.get_image_info("wide.jpg")["has_caption"] is False
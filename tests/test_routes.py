@@ -54,6 +54,24 @@ def test_api_scale(client):
     assert data["success"] is True
     assert "test_50x50.jpg" in data["filename"]
 
+def test_api_scale_encoder(client):
+    response = client.post('/api/image/test.jpg/scale', json={"width": 20, "height": 20, "encoder": "small"})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["encoder"] == "small"
+    assert data["outputs"][0]["filename"] == data["filename"]
+    assert data["outputs"][0]["bytes"] > 0
+    assert "encode_ms" in data["outputs"][0]
+    response = client.post('/api/image/test.jpg/scale', json={"width": 20, "height": 20, "encoder": "tiny"})
+    assert response.status_code == 400
+
+def test_api_scale_resample(client):
+    response = client.post('/api/image/test.jpg/scale', json={"width": 20, "height": 20, "resample": "fast"})
+    assert response.status_code == 200
+    response = client.post('/api/image/test.jpg/scale', json={"width": 20, "height": 20, "resample": "nearest"})
+    assert response.status_code == 400
+    assert "resample" in json.loads(response.data)["error"]
+
 def test_api_crop(client):
     response = client.post('/api/image/test.jpg/crop', 
                            data=json.dumps({"x": 0, "y": 0, "width": 50, "height": 50}),
@@ -62,6 +80,18 @@ def test_api_crop(client):
     data = json.loads(response.data)
     assert data["success"] is True
 
+def test_api_crop_lossless_reports_mode(client):
+    response = client.post('/api/image/test.jpg/crop',
+                           data=json.dumps({"x": 20, "y": 10, "width": 50, "height": 50, "lossless": True}),
+                           content_type='application/json')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    # Snapped to the 16px block grid when jpegtran is available, else re-encoded
+    if data["lossless"]:
+        assert data["crop"] == {"x": 16, "y": 0, "width": 54, "height": 60}
+    else:
+        assert "crop" not in data
+
 def test_api_trash(client):
     response = client.post('/api/image/test.jpg/trash')
     assert response.status_code == 200
@@ -71,3 +101,209 @@ def test_api_trash(client):
 def test_api_image_not_found(client):
     response = client.get('/api/image/nonexistent.jpg/info')
     assert response.status_code == 404
+
+def test_api_images_paginated(app, client):
+    img_dir = app.config['IMAGE_DIR']
+    for name in ["a.jpg", "b.jpg", "c.jpg"]:
+        Image.new('RGB', (10, 10)).save(os.path.join(img_dir, name))
+    app.config['PROCESSOR'].index.refresh(force=True)
+
+    response = client.get('/api/images?offset=1&limit=2')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["images"] == ["b.jpg", "c.jpg"]
+    assert data["count"] == 4
+    assert data["offset"] == 1
+    assert data["next_cursor"]
+
+    response = client.get(f'/api/images?cursor={data["next_cursor"]}&limit=2')
+    data = json.loads(response.data)
+    assert data["images"] == ["test.jpg"]
+    assert data["offset"] == 3
+    assert data["next_cursor"] is None
+
+def test_api_images_invalid_paging(client):
+    assert client.get('/api/images?limit=abc').status_code == 400
+    assert client.get('/api/images?offset=-1&limit=2').status_code == 400
+    assert client.get('/api/images?cursor=not-a-cursor').status_code == 400
+
+def test_api_stats(client):
+    client.get('/api/image/test.jpg/info')
+    client.get('/api/image/test.jpg/info')
+    response = client.get('/api/stats')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["metadata_cache"]["hits"] == 1
+    assert data["metadata_cache"]["misses"] == 1
+
+def test_api_images_details(client):
+    response = client.get('/api/images?details=1&limit=10')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["images"][0]["filename"] == "test.jpg"
+    assert data["images"][0]["width"] == 100
+
+def test_api_images_info_batch(client):
+    response = client.post('/api/images/info',
+                           data=json.dumps({"filenames": ["test.jpg", "nonexistent.jpg"]}),
+                           content_type='application/json')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert [info["width"] for info in data["images"]] == [100]
+    assert data["missing"] == ["nonexistent.jpg"]
+
+    response = client.post('/api/images/info',
+                           data=json.dumps({"offset": 0, "limit": 10}),
+                           content_type='application/json')
+    data = json.loads(response.data)
+    assert data["images"][0]["filename"] == "test.jpg"
+
+def test_api_images_info_batch_invalid(client):
+    response = client.post('/api/images/info',
+                           data=json.dumps({"filenames": ["../secret.jpg"]}),
+                           content_type='application/json')
+    assert response.status_code == 400
+    response = client.post('/api/images/info', data=json.dumps({}),
+                           content_type='application/json')
+    assert response.status_code == 400
+
+def test_api_thumbnail(client):
+    response = client.get('/api/image/test.jpg/thumb?size=32')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert client.get('/api/image/test.jpg/thumb?size=5000').status_code == 400
+    assert client.get('/api/image/test.jpg/thumb?format=gif').status_code == 400
+    assert client.get('/api/image/nonexistent.jpg/thumb').status_code == 404
+
+def test_api_preview(client):
+    response = client.get('/api/image/test.jpg/preview?max=40x30')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert client.get('/api/image/test.jpg/preview?max=abc').status_code == 400
+    assert client.get('/api/image/nonexistent.jpg/preview').status_code == 404
+
+def test_api_image_conditional_get(client):
+    response = client.get('/api/image/test.jpg')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert not etag.startswith('W/')
+    assert 'no-cache' in response.headers['Cache-Control']
+
+    response = client.get('/api/image/test.jpg', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+def test_api_image_info_conditional_get(client):
+    response = client.get('/api/image/test.jpg/info')
+    etag = response.headers['ETag']
+    response = client.get('/api/image/test.jpg/info', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    # Changing the caption changes the info, so the ETag no longer matches
+    client.post('/api/image/test.jpg/caption', data=json.dumps({"caption": "red"}),
+                content_type='application/json')
+    response = client.get('/api/image/test.jpg/info', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert json.loads(response.data)["has_caption"] is True
+
+def test_api_process(client):
+    body = {"crop": {"x": 0, "y": 0, "width": 50, "height": 50},
+            "sizes": [{"width": 20, "height": 20}, {"width": 10, "height": 10}]}
+    response = client.post('/api/image/test.jpg/process', data=json.dumps(body),
+                           content_type='application/json')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["filenames"] == ["test_crop_1-1.jpg", "test_crop_1-1_20x20.jpg", "test_crop_1-1_10x10.jpg"]
+
+    response = client.post('/api/image/test.jpg/process', data=json.dumps({"sizes": [{"width": 0, "height": 1}]}),
+                           content_type='application/json')
+    assert response.status_code == 400
+
+    response = client.post('/api/image/test.jpg/process', data=json.dumps({"crop": None, "sizes": []}),
+                           content_type='application/json')
+    assert response.status_code == 400
+    assert json.loads(response.data)["error"] == "Missing crop or sizes"
+
+def test_api_buckets(client):
+    response = client.get('/api/buckets?images=1')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["buckets"]["1:1"] == {"count": 1, "images": ["test.jpg"]}
+    assert data["total"] == 1
+
+    response = client.get('/api/buckets/1:1')
+    assert json.loads(response.data)["images"] == ["test.jpg"]
+    assert client.get('/api/buckets/5:4').status_code == 404
+
+def test_autocrop_bucket_job(app, client):
+    Image.new('RGB', (160, 90)).save(Path(app.config['IMAGE_DIR']) / "wide.jpg")
+    app.config['PROCESSOR'].index.refresh(force=True)
+
+    response = client.post('/api/buckets/16:9/autocrop', json={'ratio': '1:1', 'mode': 'smart'})
+    assert response.status_code == 202
+    job_id = json.loads(response.data)["job"]["id"]
+
+    # The event stream ends once the job has finished
+    stream = client.get(f'/api/jobs/{job_id}/events')
+    assert stream.mimetype == 'text/event-stream'
+    events = [line for line in stream.get_data(as_text=True).splitlines() if line.startswith('data: ')]
+    assert json.loads(events[-1][len('data: '):])["state"] == 'done'
+
+    job = json.loads(client.get(f'/api/jobs/{job_id}').data)
+    assert job["result"]["processed"] == 1
+    assert "wide_crop_1-1.jpg" in json.loads(client.get('/api/images').data)["images"]
+
+    assert client.post('/api/buckets/16:9/autocrop', json={'ratio': 'x'}).status_code == 400
+    assert client.post('/api/buckets/5:4/autocrop', json={'ratio': '1:1'}).status_code == 404
+    assert client.get('/api/jobs/999').status_code == 404
+
+def test_create_and_cancel_job(client):
+    assert client.post('/api/jobs', json={'sizes': []}).status_code == 400
+    assert client.post('/api/jobs', json={'filenames': ['../x.jpg'], 'sizes': [{'width': 8, 'height': 8}]}).status_code == 400
+
+    response = client.post('/api/jobs', json={'sizes': [{'width': 8, 'height': 8}]})
+    assert response.status_code == 202
+    job_id = json.loads(response.data)["job"]["id"]
+    client.get(f'/api/jobs/{job_id}/events').get_data()
+
+    job = json.loads(client.get(f'/api/jobs/{job_id}').data)
+    assert job["state"] == 'done'
+    assert job["result"]["processed"] == 1
+    assert [j["id"] for j in json.loads(client.get('/api/jobs').data)["jobs"]] == [job_id]
+    assert client.post(f'/api/jobs/{job_id}/cancel').status_code == 400
+
+def test_normalize_orientation_job(client):
+    assert client.post('/api/jobs', json={'type': 'rotate'}).status_code == 400
+    response = client.post('/api/jobs', json={'type': 'normalize-orientation'})
+    assert response.status_code == 202
+    job_id = json.loads(response.data)["job"]["id"]
+    client.get(f'/api/jobs/{job_id}/events').get_data()
+
+    job = json.loads(client.get(f'/api/jobs/{job_id}').data)
+    assert job["kind"] == 'normalize-orientation'
+    assert job["result"]["upright"] == 1
+
+def test_api_events_stream(client):
+    event_id = json.loads(client.get('/api/images').data)["event_id"]
+    client.post('/api/image/test.jpg/scale', json={'width': 50, 'height': 50})
+
+    response = client.get(f'/api/events?since={event_id}', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunk = next(response.response).decode('utf-8')
+    response.close()
+    assert f"id: {event_id + 1}" in chunk
+    assert "event: added" in chunk
+    assert '"filename": "test_50x50.jpg"' in chunk
+
+    assert client.get('/api/events?since=x').status_code == 400
+
+def test_run_server_rejects_bad_options(tmp_path):
+    from server.serving import run_server
+    with pytest.raises(ValueError):
+        run_server('waitress', {'image_dir': str(tmp_path)}, '127.0.0.1', 0, workers=2)
+    with pytest.raises(ValueError):
+        run_server('tornado', {'image_dir': str(tmp_path)}, '127.0.0.1', 0)
+
+def test_processor_is_app_scoped(app):
+    with app.test_request_context():
+        from server.routes import get_processor
+        assert get_processor() is get_processor() is app.config['PROCESSOR']
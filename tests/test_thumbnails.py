@@ -0,0 +1,54 @@
+import os
+import pytest
+from PIL import Image
+from processor.image_processor import ImageProcessor
+from processor.thumbnails import ThumbnailCache
+
+@pytest.fixture
+def img_dir(tmp_path):
+    img_dir = tmp_path / "images"
+    img_dir.mkdir()
+    Image.new('RGB', (800, 400), color=(0, 0, 255)).save(img_dir / "wide.jpg")
+    return img_dir
+
+def test_thumbnail_fits_box(img_dir, tmp_path):
+    cache = ThumbnailCache(str(tmp_path / "thumbs"))
+    thumb_path = cache.get(img_dir / "wide.jpg", (100, 100))
+    with Image.open(thumb_path) as thumb:
+        assert thumb.format == "JPEG"
+        assert thumb.size == (100, 50)
+
+    # Second request is served from disk
+    assert cache.get(img_dir / "wide.jpg", (100, 100)) == thumb_path
+    assert cache.stats()["hits"] == 1
+
+def test_thumbnail_applies_orientation(img_dir, tmp_path):
+    exif = Image.Exif()
+    exif[274] = 6
+    Image.new('RGB', (800, 400)).save(img_dir / "rotated.jpg", exif=exif)
+    cache = ThumbnailCache(str(tmp_path / "thumbs"))
+    with Image.open(cache.get(img_dir / "rotated.jpg", (100, 100), 'webp')) as thumb:
+        assert thumb.format == "WEBP"
+        assert thumb.size == (50, 100)
+
+def test_thumbnail_eviction(img_dir, tmp_path):
+    cache = ThumbnailCache(str(tmp_path / "thumbs"), max_bytes=1)
+    cache.get(img_dir / "wide.jpg", (64, 64))
+    cache.get(img_dir / "wide.jpg", (32, 32))
+    assert cache.stats()["bytes"] <= 1
+
+def test_thumbnail_invalidated_by_scale(img_dir, tmp_path):
+    cache = ThumbnailCache(str(tmp_path / "thumbs"))
+    processor = ImageProcessor(str(img_dir), thumbnails=cache)
+    old_path = processor.get_thumbnail("wide.jpg", 100)
+    processor.scale_image("wide.jpg", 200, 200)
+    assert not os.path.exists(old_path)
+    with Image.open(processor.get_thumbnail("wide.jpg", 100)) as thumb:
+        assert thumb.size == (100, 100)
+
+def test_preview_keeps_aspect_ratio(img_dir, tmp_path):
+    processor = ImageProcessor(str(img_dir), thumbnails=ThumbnailCache(str(tmp_path / "thumbs")))
+    with Image.open(processor.get_preview("wide.jpg", 512, 512)) as preview:
+        assert preview.size == (512, 256)
+    info = processor.get_image_info("wide.jpg")
+    assert info["width"] / info["height"] == 512 / 256
@@ -0,0 +1,62 @@
+import time
+import pytest
+from PIL import Image
+from processor.directory_index import DirectoryIndex
+from processor.events import EventBus
+from processor.image_processor import ImageProcessor, SUPPORTED_EXTENSIONS
+from processor.watcher import DirectoryWatcher, _load_libc
+
+@pytest.fixture
+def processor(tmp_path):
+    Image.new('RGB', (10, 10)).save(tmp_path / "a.jpg")
+    events = EventBus()
+    index = DirectoryIndex(str(tmp_path), SUPPORTED_EXTENSIONS, events=events)
+    index.refresh(force=True)
+    return ImageProcessor(str(tmp_path), index=index)
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_apply_external_changes(processor, tmp_path):
+    events = processor.index.events
+    assert processor.get_image_info("a.jpg")["has_caption"] is False
+    start = events.last_id
+
+    Image.new('RGB', (20, 10)).save(tmp_path / "b.jpg")
+    (tmp_path / "a.txt").write_text("caption")
+    processor.apply_external_changes(["b.jpg", "a.txt"])
+    assert processor.list_images() == ["a.jpg", "b.jpg"]
+    assert processor.get_image_info("a.jpg")["has_caption"] is True
+    assert [(e['type'], e['filename']) for e in events.since(start)] == [
+        ('added', 'b.jpg'), ('caption-changed', 'a.jpg')]
+
+    # Our own writes are not reported a second time
+    processor.scale_image("b.jpg", 10, 10)
+    start = events.last_id
+    processor.apply_external_changes(["b.jpg"])
+    assert events.since(start) == []
+    processor.save_caption("a.jpg", "new caption")
+    start = events.last_id
+    processor.apply_external_changes(["a.txt"])
+    assert events.since(start) == []
+
+@pytest.mark.parametrize("use_inotify", [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(_load_libc() is None, reason="inotify not available")),
+])
+def test_watcher_picks_up_changes(processor, tmp_path, use_inotify):
+    watcher = DirectoryWatcher(processor, debounce=0.05, poll_interval=0.05, use_inotify=use_inotify)
+    assert watcher.start() == ('inotify' if use_inotify else 'polling')
+    try:
+        Image.new('RGB', (10, 10)).save(tmp_path / "c.jpg")
+        assert wait_for(lambda: "c.jpg" in processor.list_images())
+        (tmp_path / "a.jpg").unlink()
+        assert wait_for(lambda: processor.list_images() == ["c.jpg"])
+    finally:
+        watcher.stop()
+    assert processor.index.watched is False